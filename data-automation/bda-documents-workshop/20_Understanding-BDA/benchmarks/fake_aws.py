@@ -0,0 +1,385 @@
+import hashlib
+import io
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Sequence
+
+from botocore.exceptions import ClientError
+
+
+def constant(seconds: float) -> Callable[[], float]:
+    return lambda: seconds
+
+
+def uniform(low: float, high: float, rng: Optional[random.Random] = None) -> Callable[[], float]:
+    rng = rng or random.Random()
+    return lambda: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5, rng: Optional[random.Random] = None) -> Callable[[], float]:
+    """Right-skewed job durations: most jobs near ``median``, a long tail of slow ones."""
+    rng = rng or random.Random()
+    mu = math.log(median)
+    return lambda: rng.lognormvariate(mu, sigma)
+
+
+def _client_error(operation, code, message, status_code=400):
+    return ClientError({'Error': {'Code': code, 'Message': message},
+                        'ResponseMetadata': {'HTTPStatusCode': status_code}}, operation)
+
+
+class _Body(io.BytesIO):
+    """StreamingBody stand-in: file-like, plus iter_chunks."""
+
+    def iter_chunks(self, chunk_size=1024):
+        return iter(lambda: self.read(chunk_size), b'')
+
+
+class FakeS3:
+    """In-memory S3 with ETags and conditional GETs, enough for the workshop helpers."""
+
+    def __init__(self, latency: Optional[Callable[[], float]] = None):
+        self.latency = latency
+        self.objects = {}
+        self.metadata = {}
+        self.get_calls = 0
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency())
+
+    def put_object(self, Bucket, Key, Body, Metadata=None, **kwargs):
+        body = Body.encode('utf-8') if isinstance(Body, str) else bytes(Body)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        with self._lock:
+            self.objects[(Bucket, Key)] = (body, etag)
+            self.metadata[(Bucket, Key)] = dict(Metadata or {})
+        return {'ETag': etag}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, **kwargs):
+        with open(Filename, 'rb') as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f.read(), Metadata=(ExtraArgs or {}).get('Metadata'))
+
+    def _get(self, operation, Bucket, Key):
+        with self._lock:
+            entry = self.objects.get((Bucket, Key))
+        if entry is None:
+            raise _client_error(operation, 'NoSuchKey', 'The specified key does not exist.', 404)
+        return entry
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._wait()
+        body, etag = self._get('HeadObject', Bucket, Key)
+        return {'ETag': etag, 'ContentLength': len(body), 'Metadata': dict(self.metadata.get((Bucket, Key), {}))}
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None, Range=None, **kwargs):
+        self._wait()
+        with self._lock:
+            self.get_calls += 1
+        body, etag = self._get('GetObject', Bucket, Key)
+        if IfNoneMatch is not None and IfNoneMatch == etag:
+            raise _client_error('GetObject', '304', 'Not Modified', 304)
+        if Range:
+            start, _, end = Range.replace('bytes=', '').partition('-')
+            body = body[int(start):int(end) + 1 if end else None]
+        return {'Body': _Body(body), 'ETag': etag, 'ContentLength': len(body)}
+
+    def generate_presigned_url(self, ClientMethod, Params=None, ExpiresIn=3600, **kwargs):
+        params = Params or {}
+        return f"https://{params.get('Bucket')}.s3.amazonaws.com/{params.get('Key')}?X-Amz-Expires={ExpiresIn}"
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None, MaxKeys=1000, **kwargs):
+        self._wait()
+        with self._lock:
+            keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + MaxKeys]
+        response = {'KeyCount': len(page),
+                    'Contents': [{'Key': key, 'Size': len(self.objects[(Bucket, key)][0]),
+                                  'ETag': self.objects[(Bucket, key)][1]} for key in page],
+                    'IsTruncated': start + MaxKeys < len(keys)}
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = str(start + MaxKeys)
+        return response
+
+    def get_paginator(self, operation_name):
+        if operation_name != 'list_objects_v2':
+            raise ValueError(f'No fake paginator for {operation_name!r}')
+        return _ListObjectsPaginator(self)
+
+
+class _ListObjectsPaginator:
+
+    def __init__(self, s3: FakeS3):
+        self.s3 = s3
+
+    def paginate(self, **kwargs):
+        token = None
+        while True:
+            response = self.s3.list_objects_v2(ContinuationToken=token, **kwargs)
+            yield response
+            if not response['IsTruncated']:
+                return
+            token = response['NextContinuationToken']
+
+
+def make_standard_output(pages: int = 2, elements_per_page: int = 20, text_size: int = 200,
+                         image_prefix: str = 's3://bench/images') -> Dict:
+    """Synthetic standard output with the fields the helpers read."""
+    text = ('lorem ipsum ' * (text_size // 12 + 1))[:text_size]
+    result = {
+        'metadata': {'number_of_pages': pages},
+        'document': {'representation': {'text': text, 'markdown': text}},
+        'pages': [],
+        'elements': [],
+        'text_lines': []
+    }
+    reading_order = itertools.count()
+    for page_index in range(pages):
+        result['pages'].append({
+            'id': str(uuid.uuid4()),
+            'page_index': page_index,
+            'representation': {'text': text, 'markdown': text},
+            'asset_metadata': {'rectified_image': f'{image_prefix}/page_{page_index}.png'}
+        })
+        for element in range(elements_per_page):
+            top = (element % 40) / 40
+            bounding_box = {'left': 0.05, 'top': top, 'width': 0.9, 'height': 0.02}
+            result['elements'].append({
+                'id': str(uuid.uuid4()),
+                'type': 'TABLE' if element % 10 == 9 else 'TEXT',
+                'sub_type': 'PARAGRAPH',
+                'page_indices': [page_index],
+                'reading_order': next(reading_order),
+                'representation': {'text': text, 'markdown': text},
+                'locations': [{'page_index': page_index, 'bounding_box': bounding_box}]
+            })
+            result['text_lines'].append({
+                'id': str(uuid.uuid4()),
+                'page_index': page_index,
+                'text': text[:60],
+                'locations': [{'page_index': page_index, 'bounding_box': bounding_box}]
+            })
+    return result
+
+
+def make_custom_output(fields: int = 20, table_rows: int = 50, table_columns: int = 5,
+                       page_indices: Sequence[int] = (0,), blueprint_name: str = 'bench-blueprint') -> Dict:
+    """Synthetic custom output: ``fields`` form fields and one table of ``table_rows`` rows."""
+    inference_result = {f'field_{i}': f'value {i}' for i in range(fields)}
+    explainability = {f'field_{i}': {'value': f'value {i}', 'confidence': 0.5 + (i % 50) / 100}
+                      for i in range(fields)}
+    columns = [f'column_{c}' for c in range(table_columns)]
+    if table_rows:
+        inference_result['transactions'] = [{column: f'{row}-{column}' for column in columns}
+                                            for row in range(table_rows)]
+        explainability['transactions'] = [{column: {'value': f'{row}-{column}', 'confidence': 0.9}
+                                           for column in columns} for row in range(table_rows)]
+    return {
+        'matched_blueprint': {'arn': f'arn:aws:bedrock:us-west-2:123456789012:blueprint/{blueprint_name}',
+                              'name': blueprint_name, 'confidence': 0.95},
+        'document_class': {'type': 'Benchmark'},
+        'split_document': {'page_indices': list(page_indices)},
+        'inference_result': inference_result,
+        'explainability_info': [explainability]
+    }
+
+
+class FakeDataAutomationRuntime:
+    """
+    bedrock-data-automation-runtime stand-in.
+
+    Each invocation gets a duration drawn from ``latency`` and walks through
+    ``status_sequence`` before finishing as Success (or ServiceError with
+    probability ``failure_rate``). On success the job_metadata, standard and
+    custom outputs are written to the FakeS3 under the requested output URI,
+    shaped like real BDA output. ``invoke_tps`` throttles submissions with a
+    token bucket; like a boto3 client, a throttled call is retried with
+    backoff up to ``client_retries`` times before ThrottlingException is raised.
+    """
+
+    def __init__(self, s3: FakeS3, latency: Callable[[], float] = constant(0.2),
+                 status_sequence: Sequence[str] = ('Created', 'InProgress'),
+                 failure_rate: float = 0.0, invoke_tps: Optional[float] = None,
+                 segments: int = 1, standard_output: Optional[Dict] = None,
+                 custom_output: Optional[Dict] = None, client_retries: int = 4,
+                 seed: Optional[int] = None):
+        self.s3 = s3
+        self.latency = latency
+        self.status_sequence = list(status_sequence)
+        self.failure_rate = failure_rate
+        self.invoke_tps = invoke_tps
+        self.segments = segments
+        self.client_retries = client_retries
+        self.rng = random.Random(seed)
+        # Serialized once; every job writes the same payload bytes
+        self.standard_output_bytes = json.dumps(standard_output or make_standard_output()).encode('utf-8')
+        self.custom_output_bytes = json.dumps(custom_output or make_custom_output()).encode('utf-8')
+        self.jobs = {}
+        self.client_tokens = {}
+        self.counters = {'invocations': 0, 'status_calls': 0, 'throttled': 0}
+        self._lock = threading.Lock()
+        self._tokens = invoke_tps or 0
+        self._refilled_at = time.monotonic()
+
+    def _take_token(self):
+        if not self.invoke_tps:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.invoke_tps, self._tokens + (now - self._refilled_at) * self.invoke_tps)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def invoke_data_automation_async(self, inputConfiguration, outputConfiguration, clientToken=None, **kwargs):
+        with self._lock:
+            # Like the service, a repeated clientToken returns the original job
+            if clientToken in self.client_tokens:
+                return {'invocationArn': self.client_tokens[clientToken]}
+        for attempt in range(self.client_retries + 1):
+            with self._lock:
+                if self._take_token():
+                    break
+                self.counters['throttled'] += 1
+            if attempt == self.client_retries:
+                raise _client_error('InvokeDataAutomationAsync', 'ThrottlingException', 'Rate exceeded')
+            # botocore's exponential backoff with full jitter
+            time.sleep(self.rng.random() * min(20, 2 ** attempt))
+        with self._lock:
+            self.counters['invocations'] += 1
+            job_id = str(uuid.uuid4())
+            self.jobs[job_id] = {
+                'input_s3_uri': inputConfiguration['s3Uri'],
+                'output_s3_uri': outputConfiguration['s3Uri'].rstrip('/'),
+                'started_at': time.monotonic(),
+                'duration': self.latency(),
+                'fails': self.rng.random() < self.failure_rate,
+                'written': False
+            }
+            invocation_arn = f'arn:aws:bedrock:us-west-2:123456789012:data-automation-invocation/{job_id}'
+            if clientToken:
+                self.client_tokens[clientToken] = invocation_arn
+        return {'invocationArn': invocation_arn}
+
+    def _write_outputs(self, job_id, job):
+        bucket, _, prefix = job['output_s3_uri'][len('s3://'):].partition('/')
+        job_prefix = f'{prefix}/{job_id}/0'.lstrip('/')
+        segment_metadata = []
+        for segment_index in range(self.segments):
+            standard_key = f'{job_prefix}/standard_output/{segment_index}/result.json'
+            custom_key = f'{job_prefix}/custom_output/{segment_index}/result.json'
+            self.s3.put_object(Bucket=bucket, Key=standard_key, Body=self.standard_output_bytes)
+            self.s3.put_object(Bucket=bucket, Key=custom_key, Body=self.custom_output_bytes)
+            segment_metadata.append({
+                'segment_index': segment_index,
+                'standard_output_path': f's3://{bucket}/{standard_key}',
+                'custom_output_status': 'MATCH',
+                'custom_output_path': f's3://{bucket}/{custom_key}'
+            })
+        job_metadata = {
+            'job_id': job_id,
+            'job_status': 'PROCESSED',
+            'semantic_modality': 'DOCUMENT',
+            'output_metadata': [{'asset_id': 0, 'asset_input_path': {'s3_path': job['input_s3_uri']},
+                                 'segment_metadata': segment_metadata}]
+        }
+        metadata_key = f'{job_prefix}/job_metadata.json'
+        self.s3.put_object(Bucket=bucket, Key=metadata_key, Body=json.dumps(job_metadata))
+        return f's3://{bucket}/{metadata_key}'
+
+    def get_data_automation_status(self, invocationArn):
+        job_id = invocationArn.split('/')[-1]
+        with self._lock:
+            self.counters['status_calls'] += 1
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise _client_error('GetDataAutomationStatus', 'ResourceNotFoundException', 'Invocation not found')
+        elapsed = time.monotonic() - job['started_at']
+        if elapsed < job['duration']:
+            step = int(elapsed / job['duration'] * len(self.status_sequence))
+            return {'status': self.status_sequence[min(step, len(self.status_sequence) - 1)]}
+        if job['fails']:
+            return {'status': 'ServiceError', 'errorType': 'ServiceError', 'errorMessage': 'Injected failure'}
+        with self._lock:
+            if not job['written']:
+                job['metadata_uri'] = self._write_outputs(job_id, job)
+                job['written'] = True
+        return {'status': 'Success', 'outputConfiguration': {'s3Uri': job['metadata_uri']}}
+
+
+class FakeDataAutomation:
+    """bedrock-data-automation stand-in covering the blueprint calls used by the registry."""
+
+    def __init__(self, page_size: int = 100):
+        self.page_size = page_size
+        self.blueprints = {}
+        self._lock = threading.Lock()
+        self.meta = type('Meta', (), {'endpoint_url': 'https://bedrock-data-automation.us-west-2.amazonaws.com'})()
+
+    def create_blueprint(self, blueprintName, type, blueprintStage, schema, **kwargs):
+        with self._lock:
+            if any(b['blueprintName'] == blueprintName for b in self.blueprints.values()):
+                raise _client_error('CreateBlueprint', 'ConflictException', f'{blueprintName} exists')
+            arn = f'arn:aws:bedrock:us-west-2:123456789012:blueprint/{uuid.uuid4()}'
+            self.blueprints[arn] = {'blueprintArn': arn, 'blueprintName': blueprintName, 'type': type,
+                                    'blueprintStage': blueprintStage, 'schema': schema,
+                                    'lastModifiedTime': datetime.now(timezone.utc)}
+            return {'blueprint': dict(self.blueprints[arn])}
+
+    def update_blueprint(self, blueprintArn, schema, blueprintStage=None, **kwargs):
+        with self._lock:
+            blueprint = self.blueprints[blueprintArn]
+            blueprint['schema'] = schema
+            blueprint['blueprintStage'] = blueprintStage or blueprint['blueprintStage']
+            blueprint['lastModifiedTime'] = datetime.now(timezone.utc)
+            return {'blueprint': dict(blueprint)}
+
+    def get_blueprint(self, blueprintArn, **kwargs):
+        with self._lock:
+            if blueprintArn not in self.blueprints:
+                raise _client_error('GetBlueprint', 'ResourceNotFoundException', 'Blueprint not found')
+            return {'blueprint': dict(self.blueprints[blueprintArn])}
+
+    def list_blueprints(self, nextToken=None, **kwargs):
+        with self._lock:
+            summaries = [{key: value for key, value in blueprint.items() if key != 'schema'}
+                         for blueprint in self.blueprints.values()]
+        start = int(nextToken or 0)
+        response = {'blueprints': summaries[start:start + self.page_size]}
+        if start + self.page_size < len(summaries):
+            response['nextToken'] = str(start + self.page_size)
+        return response
+
+
+class FakeSession:
+    """
+    Stand-in for a boto3 Session that hands out the fakes.
+
+    Install it with ``utils.aws_clients.set_session(FakeSession(...))`` so
+    every helper that calls get_client talks to the fakes.
+    """
+
+    def __init__(self, s3: Optional[FakeS3] = None, runtime: Optional[FakeDataAutomationRuntime] = None,
+                 bda: Optional[FakeDataAutomation] = None):
+        self.s3 = s3 or FakeS3()
+        self.runtime = runtime or FakeDataAutomationRuntime(self.s3)
+        self.bda = bda or FakeDataAutomation()
+
+    def client(self, service_name, region_name=None, config=None):
+        clients = {
+            's3': self.s3,
+            'bedrock-data-automation-runtime': self.runtime,
+            'bedrock-data-automation': self.bda
+        }
+        if service_name not in clients:
+            raise ValueError(f'No fake for service {service_name!r}')
+        return clients[service_name]
@@ -0,0 +1,256 @@
+import argparse
+import contextlib
+import io
+import json
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+
+from utils.aws_clients import get_client, set_session
+from utils.batch_processing import invoke_data_automation, process_documents_in_batch
+from utils.helper_functions import read_s3_object, transform_custom_output, wait_for_completion
+from utils.instrumentation import disable_instrumentation, enable_instrumentation, print_latency_summary
+from utils.polling import PollingPolicy
+from utils.segment_outputs import list_segment_output_paths
+
+from .fake_aws import (FakeDataAutomationRuntime, FakeS3, FakeSession, constant, lognormal,
+                       make_custom_output, make_standard_output)
+
+
+STAGES = ('submit', 'wait', 'read', 'transform', 'render', 'total')
+INPUT_BUCKET = 'bench-input'
+OUTPUT_S3_URI = 's3://bench-output/results'
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (q in 0..100)."""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(q / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def build_session(args) -> FakeSession:
+    rng = random.Random(args.seed)
+    s3 = FakeS3(latency=constant(args.s3_latency) if args.s3_latency else None)
+    runtime = FakeDataAutomationRuntime(
+        s3,
+        latency=lognormal(args.job_latency, args.job_latency_sigma, rng),
+        failure_rate=args.failure_rate,
+        invoke_tps=args.invoke_tps,
+        segments=args.segments,
+        standard_output=make_standard_output(args.pages, args.elements_per_page),
+        custom_output=make_custom_output(args.fields, args.table_rows, args.table_columns),
+        seed=args.seed)
+    for i in range(args.documents):
+        s3.put_object(Bucket=INPUT_BUCKET, Key=f'documents/{i}.pdf', Body=f'%PDF-1.7 benchmark document {i}')
+    return FakeSession(s3=s3, runtime=runtime)
+
+
+def polling_policy(args) -> PollingPolicy:
+    # Same backoff shape as the default policy, scaled down to the fake's job durations
+    return PollingPolicy(first_delay=args.poll_delay, initial_delay=args.poll_delay * 2,
+                         max_delay=args.poll_delay * 30, deadline=args.deadline)
+
+
+def _import_renderers():
+    try:
+        from utils.display_functions import create_form_view, create_table_view
+    except ImportError:
+        return None
+    return create_form_view, create_table_view
+
+
+def post_process(job_metadata_s3_uri: str, timings: Dict[str, float], renderers) -> None:
+    started = time.perf_counter()
+    job_metadata = json.loads(read_s3_object(job_metadata_s3_uri))
+    outputs = []
+    for paths in list_segment_output_paths(job_metadata).values():
+        custom_output = json.loads(read_s3_object(paths['custom_output'])) if paths['custom_output'] else None
+        json.loads(read_s3_object(paths['standard_output']))
+        outputs.append(custom_output)
+    read_done = time.perf_counter()
+    transformed = [transform_custom_output(output['inference_result'], output['explainability_info'][0])
+                   for output in outputs if output]
+    transform_done = time.perf_counter()
+    if renderers:
+        create_form_view, create_table_view = renderers
+        for result in transformed:
+            create_form_view(result['forms'])
+            create_table_view(result['tables'])
+    render_done = time.perf_counter()
+    timings['read'] = read_done - started
+    timings['transform'] = transform_done - read_done
+    timings['render'] = render_done - transform_done
+
+
+def process_one(input_s3_uri: str, policy: PollingPolicy, renderers) -> Dict[str, float]:
+    timings = {}
+    started = time.perf_counter()
+    invocation_arn = invoke_data_automation(input_s3_uri, OUTPUT_S3_URI, project_arn='arn:bench:project')
+    submitted = time.perf_counter()
+    runtime_client = get_client('bedrock-data-automation-runtime')
+    response = wait_for_completion(
+        client=runtime_client,
+        get_status_function=runtime_client.get_data_automation_status,
+        status_kwargs={'invocationArn': invocation_arn},
+        status_path_in_response='status',
+        completion_states=['Success'],
+        error_states=['ClientError', 'ServiceError'],
+        polling_policy=policy)
+    timings['submit'] = submitted - started
+    timings['wait'] = time.perf_counter() - submitted
+    post_process(response['outputConfiguration']['s3Uri'], timings, renderers)
+    timings['total'] = time.perf_counter() - started
+    return timings
+
+
+def run_pipeline(args, input_s3_uris, policy, renderers):
+    """One thread per document runs submit -> wait_for_completion -> read -> transform -> render."""
+    samples, errors = [], []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(process_one, uri, policy, renderers) for uri in input_s3_uris]
+        for future in as_completed(futures):
+            try:
+                samples.append(future.result())
+            except Exception as e:
+                errors.append(str(e))
+    return samples, errors
+
+
+def run_batch(args, input_s3_uris, policy, renderers):
+    """process_documents_in_batch submits and polls; finished jobs are post-processed as they arrive."""
+    samples, errors = [], []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {}
+        for result in process_documents_in_batch(input_s3_uris, OUTPUT_S3_URI, project_arn='arn:bench:project',
+                                                 max_workers=args.concurrency, polling_policy=policy):
+            if result['status'] != 'Success':
+                errors.append(result['error'] or result['status'])
+                continue
+            # Submission is interleaved with polling here, so 'wait' runs from the start of the batch
+            timings = {'submit': float('nan'), 'wait': time.perf_counter() - started}
+            futures[executor.submit(post_process, result['job_metadata_s3_uri'], timings, renderers)] = timings
+        for future in as_completed(futures):
+            timings = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            timings['total'] = timings['wait'] + timings['read'] + timings['transform'] + timings['render']
+            samples.append(timings)
+    return samples, errors
+
+
+def run(args) -> Dict:
+    session = build_session(args)
+    set_session(session)
+    input_s3_uris = [f's3://{INPUT_BUCKET}/documents/{i}.pdf' for i in range(args.documents)]
+    policy = polling_policy(args)
+    renderers = None if args.no_render else _import_renderers()
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    output = io.StringIO() if not args.verbose else sys.stdout
+    with contextlib.redirect_stdout(output):
+        runner = run_batch if args.mode == 'batch' else run_pipeline
+        samples, errors = runner(args, input_s3_uris, policy, renderers)
+    wall_time = time.perf_counter() - started
+    traced_peak = None
+    if args.trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    set_session(None)
+
+    stages = {}
+    for stage in STAGES:
+        values = [sample[stage] for sample in samples if stage in sample and sample[stage] == sample[stage]]
+        stages[stage] = {'p50': percentile(values, 50), 'p99': percentile(values, 99),
+                         'mean': sum(values) / len(values) if values else float('nan')}
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    return {
+        'mode': args.mode,
+        'documents': args.documents,
+        'completed': len(samples),
+        'errors': len(errors),
+        'first_errors': errors[:3],
+        'wall_time_s': wall_time,
+        'throughput_docs_per_s': len(samples) / wall_time if wall_time else float('nan'),
+        'stages_s': stages,
+        'peak_rss_mb': max_rss / 2 ** 20,
+        'peak_traced_mb': traced_peak / 2 ** 20 if traced_peak is not None else None,
+        'fake_counters': dict(session.runtime.counters, s3_get_object=session.s3.get_calls),
+        'rendered': renderers is not None
+    }
+
+
+def print_report(report: Dict):
+    print(f"mode={report['mode']}  documents={report['documents']}  completed={report['completed']}  "
+          f"errors={report['errors']}")
+    print(f"wall time {report['wall_time_s']:.2f}s  throughput {report['throughput_docs_per_s']:.1f} docs/s")
+    print(f"{'stage':<10}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for stage, stats in report['stages_s'].items():
+        print(f"{stage:<10}{stats['p50'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}{stats['mean'] * 1000:>10.1f}")
+    memory = f"peak RSS {report['peak_rss_mb']:.0f} MB"
+    if report['peak_traced_mb'] is not None:
+        memory += f", peak Python allocations {report['peak_traced_mb']:.1f} MB"
+    print(memory)
+    print('fake service calls: ' + ', '.join(f'{k}={v}' for k, v in report['fake_counters'].items()))
+    if not report['rendered']:
+        print('render stage skipped')
+    for error in report['first_errors']:
+        print(f'error: {error}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmark of the BDA workshop helpers against in-process fakes')
+    parser.add_argument('--mode', choices=('pipeline', 'batch'), default='pipeline',
+                        help='pipeline: wait_for_completion per document; batch: process_documents_in_batch')
+    parser.add_argument('--documents', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--job-latency', type=float, default=0.5, help='Median fake job duration in seconds')
+    parser.add_argument('--job-latency-sigma', type=float, default=0.5, help='Log-normal spread of job durations')
+    parser.add_argument('--s3-latency', type=float, default=0.0, help='Added latency per fake S3 call in seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--invoke-tps', type=float, default=None, help='Throttle submissions above this rate')
+    parser.add_argument('--poll-delay', type=float, default=0.05, help='First status poll delay in seconds')
+    parser.add_argument('--deadline', type=float, default=120)
+    parser.add_argument('--segments', type=int, default=1, help='Segments per job')
+    parser.add_argument('--pages', type=int, default=2, help='Pages per standard output')
+    parser.add_argument('--elements-per-page', type=int, default=20)
+    parser.add_argument('--fields', type=int, default=20, help='Form fields per custom output')
+    parser.add_argument('--table-rows', type=int, default=50)
+    parser.add_argument('--table-columns', type=int, default=5)
+    parser.add_argument('--no-render', action='store_true', help='Skip the render stage')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also report peak Python allocations (tracemalloc slows the run)')
+    parser.add_argument('--spans', action='store_true', help='Enable instrumentation and print per-span latencies')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+    parser.add_argument('--verbose', action='store_true', help="Show the helpers' progress output")
+    args = parser.parse_args(argv)
+
+    if args.spans:
+        enable_instrumentation()
+    report = run(args)
+    print_report(report)
+    if args.spans:
+        print_latency_summary()
+        disable_instrumentation()
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import json
+import threading
+from typing import Optional
+
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+_session = None
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(service_name: str,
+               region_name: Optional[str] = None,
+               max_pool_connections: Optional[int] = None,
+               **config_kwargs):
+    """
+    Return a shared boto3 client, creating it on first use.
+
+    Clients are cached per service, region and botocore Config, so repeated
+    calls are a dictionary lookup. boto3 clients are thread-safe and can be
+    shared across worker threads once created; creation itself is serialized.
+
+    Args:
+        service_name (str): AWS service, e.g. 's3' or 'bedrock-data-automation-runtime'
+        region_name (Optional[str]): Region, defaults to the session's region
+        max_pool_connections (Optional[int]): Size of the client's HTTP connection pool
+        **config_kwargs: Additional botocore Config options, e.g. retries or signature_version
+
+    Returns:
+        The boto3 client
+    """
+    config_kwargs['max_pool_connections'] = max_pool_connections or DEFAULT_MAX_POOL_CONNECTIONS
+    key = (service_name, region_name, json.dumps(config_kwargs, sort_keys=True, default=str))
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                # Imported on first use: boto3 is the largest import of the headless helpers
+                from botocore.config import Config
+                client = _get_session().client(service_name, region_name=region_name,
+                                               config=Config(**config_kwargs))
+                _clients[key] = client
+    return client
+
+
+def clear_clients():
+    """Drop all cached clients, e.g. after credentials or the default region change."""
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
+
+
+def set_session(session):
+    """
+    Create clients from ``session`` from now on, e.g. a boto3 Session for another
+    profile, or any object with a compatible ``client()`` method such as the
+    offline stand-in used by the benchmarks.
+    """
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = session
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        import boto3
+        _session = boto3.session.Session()
+    return _session
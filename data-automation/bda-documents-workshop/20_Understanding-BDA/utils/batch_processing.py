@@ -0,0 +1,277 @@
+import heapq
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .aws_clients import get_client
+from .dedup_index import DedupIndex, data_automation_config, sha256_s3_object
+from .instrumentation import record_span, span
+from .job_journal import JobJournal
+from .polling import PollingPolicy
+
+
+TERMINAL_STATES = ('Success', 'ServiceError', 'ClientError')
+
+
+def invoke_data_automation(input_s3_uri: str,
+                           output_s3_uri: str,
+                           project_arn: Optional[str] = None,
+                           blueprint_arns: Optional[List[str]] = None,
+                           stage: str = 'LIVE',
+                           runtime_client=None,
+                           client_token: Optional[str] = None) -> str:
+    """
+    Submit a single document to Bedrock Data Automation.
+
+    Args:
+        input_s3_uri (str): S3 URI of the input document
+        output_s3_uri (str): S3 URI prefix where BDA writes its outputs
+        project_arn (Optional[str]): Data automation project to run, if any
+        blueprint_arns (Optional[List[str]]): Blueprints to apply when no project is given
+        stage (str): Project / blueprint stage
+        runtime_client: bedrock-data-automation-runtime client
+        client_token (Optional[str]): Idempotency token; resubmitting with the same token
+            returns the original job instead of starting another
+
+    Returns:
+        str: The invocationArn of the submitted job
+    """
+    runtime_client = runtime_client or get_client('bedrock-data-automation-runtime')
+    kwargs = {
+        'inputConfiguration': {'s3Uri': input_s3_uri},
+        'outputConfiguration': {'s3Uri': output_s3_uri},
+    }
+    if project_arn:
+        kwargs['dataAutomationConfiguration'] = {
+            'dataAutomationArn': project_arn,
+            'stage': stage
+        }
+    if blueprint_arns:
+        kwargs['blueprints'] = [{'blueprintArn': arn, 'stage': stage} for arn in blueprint_arns]
+    if client_token:
+        kwargs['clientToken'] = client_token
+    with span('bda.invoke_data_automation', input_s3_uri=input_s3_uri) as invoke_span:
+        response = runtime_client.invoke_data_automation_async(**kwargs)
+        invoke_span.set('job_id', response['invocationArn'].split('/')[-1])
+    return response['invocationArn']
+
+
+def process_documents_in_batch(input_s3_uris: Iterable[Union[str, Tuple[str, Optional[str]]]],
+                               output_s3_uri: str,
+                               project_arn: Optional[str] = None,
+                               blueprint_arns: Optional[List[str]] = None,
+                               stage: str = 'LIVE',
+                               max_workers: int = 8,
+                               max_in_flight: int = 500,
+                               polling_policy: Optional[PollingPolicy] = None,
+                               max_poll_errors: int = 3,
+                               dedup_index: Optional[DedupIndex] = None,
+                               dedup_extra_config: Optional[Dict] = None,
+                               journal: Optional[JobJournal] = None,
+                               runtime_client=None) -> Iterator[Dict]:
+    """
+    Submit many documents to BDA and yield each job as soon as it finishes.
+
+    Submissions and status checks share one bounded worker pool, and every
+    in-flight invocationArn is tracked by a single polling schedule, so the
+    total run time is governed by the slowest jobs rather than the sum of all
+    of them. Results are yielded in completion order, not input order.
+
+    Args:
+        input_s3_uris (Iterable[Union[str, Tuple[str, Optional[str]]]]): S3 URIs of the documents
+            to process, or (S3 URI, version) pairs such as the object's ETag; the version is part
+            of the journal key, so a document replaced under the same URI is processed again
+        output_s3_uri (str): S3 URI prefix where BDA writes its outputs
+        project_arn (Optional[str]): Data automation project to run, if any
+        blueprint_arns (Optional[List[str]]): Blueprints to apply when no project is given
+        stage (str): Project / blueprint stage
+        max_workers (int): Maximum number of concurrent API calls
+        max_in_flight (int): Maximum number of submitted jobs not yet finished
+        polling_policy (Optional[PollingPolicy]): Backoff and deadline applied to each job; its
+            clock and sleep drive the poll schedule, so a simulated clock can be injected
+        max_poll_errors (int): Consecutive status-check errors before a job is given up on
+        dedup_index (Optional[DedupIndex]): Reuse earlier results for byte-identical documents
+            processed with the same configuration instead of invoking BDA again; duplicates
+            within the batch share a single invocation
+        dedup_extra_config (Optional[Dict]): Extra configuration included in the dedup key
+        journal (Optional[JobJournal]): Record every submission and status change so that
+            running the same batch again after a crash skips documents that already
+            succeeded and resumes polling jobs that were in flight instead of resubmitting them.
+            Entries are keyed by URI (and version, when given): without a version, reuse
+            assumes the object under a URI never changes
+        runtime_client: bedrock-data-automation-runtime client
+
+    Yields:
+        Dict: input_s3_uri, invocation_arn, status, job_metadata_s3_uri,
+        status_response, error and cached for every finished job
+    """
+    runtime_client = runtime_client or get_client('bedrock-data-automation-runtime',
+                                                  max_pool_connections=max_workers)
+    polling_policy = polling_policy or PollingPolicy()
+    clock = polling_policy.clock
+    pending_uris = iter(input_s3_uris)
+    exhausted = False
+    in_flight = 0
+    running = {}
+    poll_schedule = []
+    sequence = itertools.count()
+    config = data_automation_config(project_arn, blueprint_arns, stage, dedup_extra_config)
+    s3_client = get_client('s3', max_pool_connections=max_workers) if dedup_index else None
+    journal_config = dict(config, output_s3_uri=output_s3_uri)
+
+    # Jobs currently being processed per dedup key, so identical documents
+    # within the same batch wait for one invocation instead of each running
+    leaders = {}
+
+    def lookup(job):
+        job['document_sha256'] = sha256_s3_object(job['input_s3_uri'], s3_client)
+        return dedup_index.get('data_automation', job['document_sha256'], config)
+
+    def submit(job):
+        client_token = journal.start(job['input_s3_uri'], job['journal_config']) if journal else None
+        invocation_arn = invoke_data_automation(job['input_s3_uri'], output_s3_uri, project_arn,
+                                                blueprint_arns, stage, runtime_client, client_token)
+        if journal:
+            journal.record_submission(job['input_s3_uri'], job['journal_config'], invocation_arn)
+        return invocation_arn
+
+    def journaled(jobs, results):
+        if journal:
+            for job, result in zip(jobs, results):
+                journal.update_status(result['input_s3_uri'], job['journal_config'], result['status'],
+                                      result['job_metadata_s3_uri'], result['error'], result['invocation_arn'])
+        return results
+
+    def schedule_poll(job):
+        heapq.heappush(poll_schedule, (clock() + polling_policy.delay(job['attempt']), next(sequence), job))
+        job['attempt'] += 1
+
+    def result_for(job, status=None, status_response=None, error=None, cached=False):
+        job_metadata_s3_uri = None
+        if status == 'Success':
+            job_metadata_s3_uri = status_response['outputConfiguration']['s3Uri']
+        return {
+            'input_s3_uri': job['input_s3_uri'],
+            'invocation_arn': job.get('invocation_arn'),
+            'status': status,
+            'job_metadata_s3_uri': job_metadata_s3_uri,
+            'status_response': status_response,
+            'error': error,
+            'cached': cached
+        }
+
+    def finish(job, status=None, status_response=None, error=None):
+        if 'submitted_at' in job:
+            # Submission to completion of the job as seen by the batch poller
+            record_span('bda.batch_job', clock() - job['submitted_at'],
+                        job_id=job['invocation_arn'].split('/')[-1], status=status, polls=job['attempt'])
+        if status == 'Success' and dedup_index and 'document_sha256' in job:
+            status_response = {key: value for key, value in status_response.items() if key != 'ResponseMetadata'}
+            dedup_index.put('data_automation', job['document_sha256'], config, status_response)
+        jobs = [job]
+        results = [result_for(job, status, status_response, error)]
+        for follower in leaders.pop(job.get('document_sha256'), {}).get('followers', []):
+            follower['invocation_arn'] = job.get('invocation_arn')
+            jobs.append(follower)
+            results.append(result_for(follower, status, status_response, error, cached=True))
+        return journaled(jobs, results)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            while not exhausted and in_flight < max_in_flight:
+                pending_input = next(pending_uris, None)
+                if pending_input is None:
+                    exhausted = True
+                    break
+                input_s3_uri, input_version = (pending_input, None) if isinstance(pending_input, str) else pending_input
+                job = {'input_s3_uri': input_s3_uri, 'poll_errors': 0, 'attempt': 0,
+                       'journal_config': dict(journal_config, input_version=input_version) if input_version
+                       else journal_config}
+                entry = journal.get(input_s3_uri, job['journal_config']) if journal else None
+                if entry and entry['status'] == 'Success':
+                    job['invocation_arn'] = entry['invocation_arn']
+                    yield result_for(job, status='Success', cached=True, status_response={
+                        'status': 'Success', 'outputConfiguration': {'s3Uri': entry['job_metadata_s3_uri']}})
+                    continue
+                if entry and entry['invocation_arn'] and entry['status'] not in TERMINAL_STATES:
+                    # Submitted by an earlier run that stopped before the job finished
+                    job['invocation_arn'] = entry['invocation_arn']
+                    job['submitted_at'] = clock()
+                    job['status'] = entry['status']
+                    schedule_poll(job)
+                elif dedup_index:
+                    running[executor.submit(lookup, job)] = ('lookup', job)
+                else:
+                    running[executor.submit(submit, job)] = ('submit', job)
+                in_flight += 1
+
+            now = clock()
+            while poll_schedule and poll_schedule[0][0] <= now:
+                _, _, job = heapq.heappop(poll_schedule)
+                future = executor.submit(runtime_client.get_data_automation_status,
+                                         invocationArn=job['invocation_arn'])
+                running[future] = ('poll', job)
+
+            if not running and not poll_schedule:
+                if exhausted:
+                    return
+                continue
+
+            timeout = None
+            if poll_schedule:
+                timeout = max(0, poll_schedule[0][0] - clock())
+            if not running:
+                # Only scheduled polls remain: wait through the policy so an injected clock / sleep
+                # (as used offline) advances to the next poll instead of spinning on real time
+                polling_policy.sleep(timeout)
+                continue
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                kind, job = running.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    if kind == 'poll' and job['poll_errors'] + 1 < max_poll_errors:
+                        job['poll_errors'] += 1
+                        schedule_poll(job)
+                        continue
+                    results = finish(job, error=str(e)) if kind != 'lookup' else [result_for(job, error=str(e))]
+                    in_flight -= len(results)
+                    yield from results
+                    continue
+
+                if kind == 'lookup':
+                    if response:
+                        # The stored status response of an earlier identical job
+                        in_flight -= 1
+                        yield from journaled([job], [result_for(job, status=response['status'],
+                                                                status_response=response, cached=True)])
+                    elif job['document_sha256'] in leaders:
+                        leaders[job['document_sha256']]['followers'].append(job)
+                    else:
+                        leaders[job['document_sha256']] = {'job': job, 'followers': []}
+                        running[executor.submit(submit, job)] = ('submit', job)
+                    continue
+                if kind == 'submit':
+                    job['invocation_arn'] = response
+                    job['submitted_at'] = clock()
+                else:
+                    job['poll_errors'] = 0
+                    status = response['status']
+                    if journal and status != job.get('status') and status not in TERMINAL_STATES:
+                        journal.update_status(job['input_s3_uri'], job['journal_config'], status,
+                                              invocation_arn=job['invocation_arn'])
+                    job['status'] = status
+                    if status in TERMINAL_STATES:
+                        results = finish(job, status=status, status_response=response)
+                        in_flight -= len(results)
+                        yield from results
+                        continue
+                    if polling_policy.expired(job['submitted_at']):
+                        results = finish(job, status=status, status_response=response,
+                                         error=f'Job did not complete within {polling_policy.deadline}s')
+                        in_flight -= len(results)
+                        yield from results
+                        continue
+                schedule_poll(job)
@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .aws_clients import get_client
+from .batch_processing import process_documents_in_batch
+from .dedup_index import DEFAULT_INDEX_PATH, DedupIndex, sha256_file
+from .helper_functions import get_bucket_and_key, read_s3_json, transform_custom_output
+from .instrumentation import enable_instrumentation, print_latency_summary
+from .job_journal import DEFAULT_JOURNAL_PATH, JobJournal
+from .polling import PollingPolicy
+from .segment_outputs import fetch_segment_outputs
+
+
+DEFAULT_EXTENSIONS = ('.pdf', '.png', '.jpg', '.jpeg', '.tif', '.tiff')
+
+
+def list_local_documents(directory: str, extensions=DEFAULT_EXTENSIONS) -> List[str]:
+    """Paths of the documents under ``directory`` (recursively), sorted."""
+    paths = []
+    for root, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            if file_name.lower().endswith(tuple(extensions)):
+                paths.append(os.path.join(root, file_name))
+    return sorted(paths)
+
+
+def list_s3_documents(s3_prefix: str, s3_client=None, extensions=DEFAULT_EXTENSIONS,
+                      with_etags: bool = False) -> Iterator:
+    """
+    S3 URIs of the documents under ``s3_prefix``, listed page by page.
+
+    With ``with_etags``, yields (S3 URI, ETag) pairs instead, e.g. to pass to
+    process_documents_in_batch so a replaced object is processed again.
+    """
+    s3_client = s3_client or get_client('s3')
+    bucket_name, prefix = get_bucket_and_key(s3_prefix)
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=prefix):
+        for entry in page.get('Contents', []):
+            if entry['Key'].lower().endswith(tuple(extensions)):
+                s3_uri = f"s3://{bucket_name}/{entry['Key']}"
+                yield (s3_uri, entry.get('ETag')) if with_etags else s3_uri
+
+
+def upload_documents(directory: str, input_s3_prefix: str, s3_client=None, max_workers: int = 16,
+                     on_error: Optional[Callable[[str, Exception], None]] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Upload every document under ``directory`` to ``input_s3_prefix``, keeping
+    relative paths, and yield (S3 URI, SHA-256 of the content) as each upload
+    finishes.
+
+    The SHA-256 is stored as object metadata, and a file whose object already
+    carries the same SHA-256 is not uploaded again, so a restarted run only
+    pays for hashing and a HEAD request per unchanged document.
+
+    Args:
+        directory (str): Local directory of documents
+        input_s3_prefix (str): S3 prefix to upload to
+        s3_client: S3 client to share across uploads
+        max_workers (int): Maximum number of concurrent uploads
+        on_error (Optional[Callable[[str, Exception], None]]): Called with the file path and
+            error of a failed upload, which is then skipped; without it the error is raised
+    """
+    s3_client = s3_client or get_client('s3', max_pool_connections=max_workers)
+    bucket_name, prefix = get_bucket_and_key(input_s3_prefix.rstrip('/') + '/')
+
+    def upload(file_path):
+        relative_path = os.path.relpath(file_path, directory).replace(os.sep, '/')
+        object_key = f'{prefix}{relative_path}'
+        try:
+            document_sha256 = sha256_file(file_path)
+            try:
+                head = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+            except Exception:
+                head = {}
+            if head.get('Metadata', {}).get('sha256') != document_sha256:
+                s3_client.upload_file(file_path, bucket_name, object_key,
+                                      ExtraArgs={'Metadata': {'sha256': document_sha256}})
+        except Exception as e:
+            return file_path, None, e
+        return f's3://{bucket_name}/{object_key}', document_sha256, None
+
+    file_paths = iter(list_local_documents(directory))
+    running = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            # Keep a bounded number of uploads queued rather than one future per file
+            while len(running) < 2 * max_workers:
+                file_path = next(file_paths, None)
+                if file_path is None:
+                    break
+                running.add(executor.submit(upload, file_path))
+            if not running:
+                return
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                source, document_sha256, error = future.result()
+                if error is None:
+                    yield source, document_sha256
+                elif on_error:
+                    on_error(source, error)
+                else:
+                    for pending in running:
+                        pending.cancel()
+                    raise error
+
+
+class JsonLinesWriter:
+    """Writes one line per document: its status and the transformed custom output of every segment."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a')
+        self._lock = threading.Lock()
+
+    def write(self, result: Dict, job_metadata: Optional[Dict] = None, segment_outputs: Optional[Dict] = None):
+        segments = []
+        for (asset_id, segment_index), outputs in sorted((segment_outputs or {}).items()):
+            custom_output = outputs.get('custom_output')
+            segment = {'asset_id': asset_id, 'segment_index': segment_index,
+                       'matched_blueprint': None, 'forms': None, 'tables': None}
+            if custom_output:
+                segment['matched_blueprint'] = custom_output.get('matched_blueprint', {}).get('name')
+                segment.update(transform_custom_output(custom_output.get('inference_result', {}),
+                                                       (custom_output.get('explainability_info') or [{}])[0]))
+            segments.append(segment)
+        record = {key: result[key] for key in ('input_s3_uri', 'invocation_arn', 'status',
+                                               'job_metadata_s3_uri', 'error', 'cached')}
+        record['job_id'] = (job_metadata or {}).get('job_id')
+        record['segments'] = segments
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Appends each successful job to a ResultsStore; failures are only reported."""
+
+    def __init__(self, root: str):
+        # Imported here so the JSON Lines output works without pyarrow
+        from .results_store import ResultsStore
+        self.store = ResultsStore(root)
+
+    def write(self, result: Dict, job_metadata: Optional[Dict] = None, segment_outputs: Optional[Dict] = None):
+        if job_metadata is not None:
+            self.store.append_job(job_metadata, segment_outputs)
+
+    def close(self):
+        pass
+
+
+def run(args) -> Dict:
+    """
+    Run the whole pipeline for ``args`` (see ``main``): upload, invoke, poll,
+    fetch outputs, transform and write results.
+
+    Returns:
+        Dict: Counts, wall time and throughput of the run
+    """
+    s3_client = get_client('s3', max_pool_connections=args.concurrency)
+    if not args.source.startswith('s3://') and not args.input_s3_uri:
+        raise Exception('--input-s3-uri is required to upload a local directory')
+
+    writer = ParquetWriter(args.results) if args.format == 'parquet' else JsonLinesWriter(args.results)
+    journal = None if args.no_journal else JobJournal(args.journal)
+    dedup_index = DedupIndex(args.dedup_index) if args.dedup else None
+    polling_policy = PollingPolicy(deadline=args.deadline)
+    counts = {'documents': 0, 'succeeded': 0, 'failed': 0, 'cached': 0, 'segments': 0}
+    failures = []
+    lock = threading.Lock()
+
+    def report_failure(result, error):
+        with lock:
+            counts['failed'] += 1
+            failures.append(f"{result['input_s3_uri']}: {error}")
+        print(f"Failed {result['input_s3_uri']}: {error}")
+
+    def report_upload_failure(file_path, error):
+        counts['documents'] += 1
+        report_failure({'input_s3_uri': file_path}, f'upload failed: {error}')
+
+    # Inputs carry a content version (ETag / SHA-256) so the journal reprocesses replaced documents
+    if args.source.startswith('s3://'):
+        input_s3_uris = list_s3_documents(args.source, s3_client, with_etags=True)
+    else:
+        input_s3_uris = upload_documents(args.source, args.input_s3_uri, s3_client, args.concurrency,
+                                         on_error=report_upload_failure)
+
+    def post_process(result):
+        try:
+            job_metadata = read_s3_json(result['job_metadata_s3_uri'], s3_client=s3_client)
+            segment_outputs = fetch_segment_outputs(job_metadata, s3_client, max_workers=args.segment_workers,
+                                                    include_standard_output=args.format == 'parquet')
+            writer.write(result, job_metadata, segment_outputs)
+        except Exception as e:
+            report_failure(result, e)
+            return
+        with lock:
+            counts['succeeded'] += 1
+            counts['segments'] += len(segment_outputs)
+
+    started = time.perf_counter()
+    try:
+        # Outputs are fetched and written on a separate pool while later jobs are still being polled
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for result in process_documents_in_batch(input_s3_uris, args.output_s3_uri,
+                                                     project_arn=args.project_arn,
+                                                     blueprint_arns=args.blueprint_arn,
+                                                     stage=args.stage,
+                                                     max_workers=args.concurrency,
+                                                     max_in_flight=args.max_in_flight,
+                                                     polling_policy=polling_policy,
+                                                     dedup_index=dedup_index,
+                                                     journal=journal):
+                counts['documents'] += 1
+                counts['cached'] += result['cached']
+                if result['cached'] and args.skip_cached:
+                    continue
+                if result['status'] != 'Success':
+                    report_failure(result, result['error'] or result['status'])
+                    if args.format == 'jsonl':
+                        writer.write(result)
+                    continue
+                executor.submit(post_process, result)
+                if counts['documents'] % args.progress_every == 0:
+                    elapsed = time.perf_counter() - started
+                    print(f"{counts['documents']} documents finished in {elapsed:.0f}s "
+                          f"({counts['documents'] / elapsed:.1f} docs/s)")
+    finally:
+        writer.close()
+        if journal:
+            journal.close()
+        if dedup_index:
+            dedup_index.close()
+
+    wall_time = time.perf_counter() - started
+    return dict(counts,
+                wall_time_s=wall_time,
+                throughput_docs_per_s=counts['documents'] / wall_time if wall_time else float('nan'),
+                failures=failures)
+
+
+def print_summary(summary: Dict):
+    print(f"{summary['documents']} documents in {summary['wall_time_s']:.1f}s "
+          f"({summary['throughput_docs_per_s']:.2f} docs/s)")
+    print(f"succeeded {summary['succeeded']}, failed {summary['failed']}, "
+          f"reused from earlier runs {summary['cached']}, segments written {summary['segments']}")
+    for failure in summary['failures'][:10]:
+        print(f'  {failure}')
+    if len(summary['failures']) > 10:
+        print(f"  ... and {len(summary['failures']) - 10} more")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Process a local directory or S3 prefix of documents with Bedrock Data Automation',
+        epilog='Run from 20_Understanding-BDA, e.g. python -m utils.batch_runner ./documents '
+               '--input-s3-uri s3://bucket/input --output-s3-uri s3://bucket/output '
+               '--project-arn <arn> --results results.jsonl')
+    parser.add_argument('source', help='Local directory or s3://bucket/prefix of input documents')
+    parser.add_argument('--output-s3-uri', required=True, help='S3 prefix where BDA writes its outputs')
+    parser.add_argument('--results', required=True,
+                        help='JSON Lines file (--format jsonl) or dataset root, local or s3:// (--format parquet)')
+    parser.add_argument('--format', choices=('jsonl', 'parquet'), default='jsonl')
+    parser.add_argument('--input-s3-uri', help='S3 prefix to upload a local directory to')
+    parser.add_argument('--project-arn', help='Data automation project to run')
+    parser.add_argument('--blueprint-arn', action='append', help='Blueprint to apply (repeatable)')
+    parser.add_argument('--stage', default='LIVE')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent uploads, API calls and output reads')
+    parser.add_argument('--segment-workers', type=int, default=4, help='Concurrent output reads per job')
+    parser.add_argument('--max-in-flight', type=int, default=500, help='Submitted jobs not yet finished')
+    parser.add_argument('--deadline', type=float, default=3600, help='Seconds to wait for each job')
+    parser.add_argument('--journal', default=DEFAULT_JOURNAL_PATH,
+                        help='Job journal used to resume an interrupted run; documents are keyed by '
+                             'URI and content, so replaced documents are processed again')
+    parser.add_argument('--no-journal', action='store_true')
+    parser.add_argument('--dedup', action='store_true',
+                        help='Reuse results of byte-identical documents processed earlier')
+    parser.add_argument('--dedup-index', default=DEFAULT_INDEX_PATH)
+    parser.add_argument('--skip-cached', action='store_true',
+                        help='Do not write results again for documents completed by an earlier run')
+    parser.add_argument('--progress-every', type=int, default=100, help='Print progress every N documents')
+    parser.add_argument('--spans', action='store_true', help='Print per-operation latencies at the end')
+    args = parser.parse_args(argv)
+    if not args.project_arn and not args.blueprint_arn:
+        parser.error('one of --project-arn or --blueprint-arn is required')
+
+    if args.spans:
+        enable_instrumentation()
+    summary = run(args)
+    print_summary(summary)
+    if args.spans:
+        print_latency_summary()
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, Optional, Union
+
+from .aws_clients import get_client
+
+
+def schema_hash(schema: Union[str, Dict]) -> str:
+    """SHA-256 of a blueprint schema in canonical form (sorted keys, no whitespace)."""
+    if isinstance(schema, str):
+        schema = json.loads(schema)
+    canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class BlueprintRegistry:
+    """
+    Name-indexed view of the blueprints in an account.
+
+    The full listing is paged through once and cached for ``ttl`` seconds.
+    Schema hashes are recorded for every blueprint created or updated through
+    the registry (and fetched once with get_blueprint otherwise), so unchanged
+    schemas do not trigger an update_blueprint call. A recorded hash is dropped
+    on refresh when the listing shows the blueprint was modified since (e.g. in
+    the console or by another process), so it is fetched again before use.
+    """
+
+    def __init__(self, bda_client=None, ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.bda_client = bda_client or get_client('bedrock-data-automation')
+        self.ttl = ttl
+        self.clock = clock
+        self._index: Dict[str, Dict] = {}
+        self._refreshed_at = None
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        """Page through list_blueprints and rebuild the name index."""
+        index = {}
+        kwargs = {'blueprintStageFilter': 'ALL'}
+        while True:
+            response = self.bda_client.list_blueprints(**kwargs)
+            for blueprint in response.get('blueprints', []):
+                name = blueprint.get('blueprintName')
+                if name and name not in index:
+                    index[name] = {
+                        'blueprintArn': blueprint['blueprintArn'],
+                        'blueprintStage': blueprint.get('blueprintStage'),
+                        'lastModifiedTime': blueprint.get('lastModifiedTime'),
+                        'blueprintVersion': blueprint.get('blueprintVersion'),
+                        'schema_hash': None
+                    }
+            if not response.get('nextToken'):
+                break
+            kwargs['nextToken'] = response['nextToken']
+        with self._lock:
+            # Keep hashes we already know for blueprints not modified since they were recorded
+            for name, entry in index.items():
+                known = self._index.get(name)
+                if known and all(known[key] == entry[key]
+                                 for key in ('blueprintArn', 'lastModifiedTime', 'blueprintVersion')):
+                    entry['schema_hash'] = known['schema_hash']
+            self._index = index
+            self._refreshed_at = self.clock()
+
+    def get(self, blueprint_name: str) -> Optional[Dict]:
+        """Return the index entry for ``blueprint_name``, refreshing the listing if it is stale."""
+        with self._lock:
+            if self._refreshed_at is None or self.clock() - self._refreshed_at >= self.ttl:
+                self.refresh()
+            return self._index.get(blueprint_name)
+
+    def names(self):
+        with self._lock:
+            if self._refreshed_at is None or self.clock() - self._refreshed_at >= self.ttl:
+                self.refresh()
+            return list(self._index)
+
+    def create_or_update(self, blueprint_name: str, blueprint_type: str, blueprint_stage: str,
+                         blueprint_schema: Union[str, Dict], dry_run: bool = False) -> Dict:
+        """
+        Create the blueprint, update it, or do nothing if its stage and schema already match.
+
+        Returns:
+            Dict: blueprintArn and the action taken ('created', 'updated' or 'unchanged';
+            'create' or 'update' when ``dry_run`` is set)
+        """
+        new_hash = schema_hash(blueprint_schema)
+        schema = blueprint_schema if isinstance(blueprint_schema, str) else json.dumps(blueprint_schema)
+        entry = self.get(blueprint_name)
+
+        if not entry:
+            if dry_run:
+                return {'blueprintArn': None, 'action': 'create'}
+            print(f'No existing blueprint found with name={blueprint_name}, creating custom blueprint')
+            response = self.bda_client.create_blueprint(
+                blueprintName=blueprint_name,
+                type=blueprint_type,
+                blueprintStage=blueprint_stage,
+                schema=schema
+            )
+            action = 'created'
+        else:
+            if entry['schema_hash'] is None:
+                current = self.bda_client.get_blueprint(blueprintArn=entry['blueprintArn'])['blueprint']
+                entry['schema_hash'] = schema_hash(current['schema'])
+                entry['blueprintStage'] = current.get('blueprintStage', entry['blueprintStage'])
+                entry['lastModifiedTime'] = current.get('lastModifiedTime', entry['lastModifiedTime'])
+                entry['blueprintVersion'] = current.get('blueprintVersion', entry['blueprintVersion'])
+            if entry['schema_hash'] == new_hash and entry['blueprintStage'] == blueprint_stage:
+                print(f'Found existing blueprint with name={blueprint_name}, Stage and Schema unchanged')
+                return {'blueprintArn': entry['blueprintArn'], 'action': 'unchanged'}
+            if dry_run:
+                return {'blueprintArn': entry['blueprintArn'], 'action': 'update'}
+            print(f'Found existing blueprint with name={blueprint_name}, updating Stage and Schema')
+            response = self.bda_client.update_blueprint(
+                blueprintArn=entry['blueprintArn'],
+                blueprintStage=blueprint_stage,
+                schema=schema
+            )
+            action = 'updated'
+
+        blueprint = response['blueprint']
+        blueprint_arn = blueprint['blueprintArn']
+        with self._lock:
+            self._index[blueprint_name] = {
+                'blueprintArn': blueprint_arn,
+                'blueprintStage': blueprint_stage,
+                'lastModifiedTime': blueprint.get('lastModifiedTime'),
+                'blueprintVersion': blueprint.get('blueprintVersion'),
+                'schema_hash': new_hash
+            }
+        return {'blueprintArn': blueprint_arn, 'action': action}
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_blueprint_registry(bda_client=None) -> BlueprintRegistry:
+    """Return the registry shared by all callers using ``bda_client``."""
+    bda_client = bda_client or get_client('bedrock-data-automation')
+    with _registries_lock:
+        registry = _registries.get(id(bda_client))
+        if registry is None or registry.bda_client is not bda_client:
+            registry = BlueprintRegistry(bda_client)
+            _registries[id(bda_client)] = registry
+        return registry
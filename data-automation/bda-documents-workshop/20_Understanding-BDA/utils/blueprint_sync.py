@@ -0,0 +1,177 @@
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .aws_clients import get_client
+from .blueprint_registry import BlueprintRegistry
+
+
+def load_blueprint_definitions(directory: str, blueprint_type: str = 'DOCUMENT', blueprint_stage: str = 'LIVE',
+                               names: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """
+    Read every ``*.json`` blueprint schema in ``directory``.
+
+    Args:
+        directory (str): Directory of schema files, e.g. 'data/blueprints'
+        blueprint_type (str): Blueprint type for all definitions
+        blueprint_stage (str): Blueprint stage for all definitions
+        names (Optional[Dict[str, str]]): Blueprint name per file stem; defaults to the file stem
+
+    Returns:
+        List[Dict]: name, type, stage, schema and schema_path of each blueprint
+    """
+    names = names or {}
+    definitions = []
+    for schema_path in sorted(Path(directory).glob('*.json')):
+        with open(schema_path) as f:
+            schema = json.load(f)
+        definitions.append({
+            'name': names.get(schema_path.stem, schema_path.stem),
+            'type': blueprint_type,
+            'stage': blueprint_stage,
+            'schema': schema,
+            'schema_path': str(schema_path)
+        })
+    return definitions
+
+
+def sync_blueprints(directory: str,
+                    project_arn: Optional[str] = None,
+                    bda_client=None,
+                    blueprint_type: str = 'DOCUMENT',
+                    blueprint_stage: str = 'LIVE',
+                    names: Optional[Dict[str, str]] = None,
+                    max_workers: int = 8,
+                    replace_project_blueprints: bool = False,
+                    dry_run: bool = False) -> List[Dict]:
+    """
+    Make the account's blueprints match a directory of schema files.
+
+    The account listing is read once, each blueprint is created, updated or
+    skipped concurrently, and the data automation project (if given) is then
+    updated with the resulting blueprint ARNs in a single call. If some
+    blueprints fail, the project is still updated with the ones that synced
+    (unless ``replace_project_blueprints`` is set) and an exception naming the
+    failures is raised afterwards.
+
+    Args:
+        directory (str): Directory of schema files
+        project_arn (Optional[str]): Project whose custom output blueprints are updated
+        bda_client: bedrock-data-automation client
+        blueprint_type (str): Blueprint type for all definitions
+        blueprint_stage (str): Blueprint stage for all definitions
+        names (Optional[Dict[str, str]]): Blueprint name per file stem
+        max_workers (int): Maximum number of concurrent blueprint API calls
+        replace_project_blueprints (bool): Drop project blueprints that are not in ``directory``
+        dry_run (bool): Only report what would change
+
+    Returns:
+        List[Dict]: name, blueprintArn and action ('created', 'updated', 'unchanged'
+        or 'create' / 'update' in a dry run) per blueprint
+    """
+    bda_client = bda_client or get_client('bedrock-data-automation', max_pool_connections=max_workers)
+    definitions = load_blueprint_definitions(directory, blueprint_type, blueprint_stage, names)
+    registry = BlueprintRegistry(bda_client)
+    registry.refresh()
+
+    def sync(definition):
+        result = registry.create_or_update(definition['name'], definition['type'], definition['stage'],
+                                           definition['schema'], dry_run=dry_run)
+        return dict(result, name=definition['name'])
+
+    results, errors = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(sync, definition): definition for definition in definitions}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append((futures[future]['name'], e))
+    # Keep the directory order regardless of which call finished first
+    order = {definition['name']: index for index, definition in enumerate(definitions)}
+    results.sort(key=lambda result: order[result['name']])
+
+    # Blueprints that did sync still reach the project; a failed one must not
+    # discard the others' work. With replace, the project is left alone so a
+    # failed blueprint is not dropped from it.
+    if project_arn and not dry_run and results and not (errors and replace_project_blueprints):
+        update_project_blueprints(bda_client, project_arn,
+                                  [(result['blueprintArn'], blueprint_stage) for result in results],
+                                  replace=replace_project_blueprints)
+    if errors:
+        for name, e in errors:
+            print(f"Failed to sync blueprint {name}: {e}")
+        raise Exception(f"Failed to sync {len(errors)} of {len(definitions)} blueprints: "
+                        f"{', '.join(name for name, _ in errors)}")
+    return results
+
+
+def update_project_blueprints(bda_client, project_arn: str, blueprints: List, replace: bool = False) -> bool:
+    """
+    Set the blueprints of a project's custom output configuration in one call.
+
+    Args:
+        bda_client: bedrock-data-automation client
+        project_arn (str): Project to update
+        blueprints (List): (blueprintArn, blueprintStage) pairs
+        replace (bool): Drop blueprints already on the project that are not in ``blueprints``
+
+    Returns:
+        bool: True if the project was updated, False if it already had these blueprints
+    """
+    project = bda_client.get_data_automation_project(projectArn=project_arn)['project']
+    custom_output_configuration = project.get('customOutputConfiguration') or {}
+    current = custom_output_configuration.get('blueprints', [])
+
+    wanted = {arn: {'blueprintArn': arn, 'blueprintStage': stage} for arn, stage in blueprints}
+    merged = [] if replace else [blueprint for blueprint in current if blueprint['blueprintArn'] not in wanted]
+    merged += list(wanted.values())
+
+    def key(blueprint):
+        return (blueprint['blueprintArn'], blueprint.get('blueprintStage'))
+    if sorted(map(key, merged)) == sorted(map(key, current)):
+        print(f'Project {project_arn} already uses these blueprints')
+        return False
+
+    kwargs = {
+        'projectArn': project_arn,
+        'standardOutputConfiguration': project['standardOutputConfiguration'],
+        'customOutputConfiguration': dict(custom_output_configuration, blueprints=merged)
+    }
+    # Carry over everything else the update accepts so it only changes the blueprints
+    for field in ('projectStage', 'projectDescription', 'overrideConfiguration', 'dataAutomationLibraryConfiguration'):
+        if project.get(field):
+            kwargs[field] = project[field]
+    if project.get('kmsKeyId'):
+        kwargs['encryptionConfiguration'] = {'kmsKeyId': project['kmsKeyId']}
+        if project.get('kmsEncryptionContext'):
+            kwargs['encryptionConfiguration']['kmsEncryptionContext'] = project['kmsEncryptionContext']
+    bda_client.update_data_automation_project(**kwargs)
+    print(f'Updated project {project_arn} with {len(merged)} blueprints')
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sync a directory of blueprint schemas to Bedrock Data Automation')
+    parser.add_argument('directory', help='Directory of blueprint schema JSON files')
+    parser.add_argument('--project-arn', help='Data automation project to attach the blueprints to')
+    parser.add_argument('--type', default='DOCUMENT', dest='blueprint_type')
+    parser.add_argument('--stage', default='LIVE', dest='blueprint_stage')
+    parser.add_argument('--max-workers', type=int, default=8)
+    parser.add_argument('--replace-project-blueprints', action='store_true')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args(argv)
+
+    results = sync_blueprints(args.directory, project_arn=args.project_arn,
+                              blueprint_type=args.blueprint_type, blueprint_stage=args.blueprint_stage,
+                              max_workers=args.max_workers,
+                              replace_project_blueprints=args.replace_project_blueprints,
+                              dry_run=args.dry_run)
+    for result in results:
+        print(f"{result['action']:>9}  {result['name']}  {result['blueprintArn'] or ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .instrumentation import span
+
+
+def _confidence(confidence_info):
+    if isinstance(confidence_info, dict):
+        return confidence_info.get('confidence')
+    return None
+
+
+def transform_custom_outputs(custom_outputs: Sequence[Optional[Dict]],
+                             segment_ids: Optional[Sequence] = None,
+                             confidence_threshold: Optional[float] = None) -> Dict:
+    """
+    Flatten many custom outputs into columnar tables in a single pass.
+
+    This is the batch counterpart of transform_custom_output + get_summaries:
+    values are appended to plain column lists and each DataFrame is built once
+    at the end. Nested objects are flattened into dotted field names.
+
+    Args:
+        custom_outputs (Sequence[Optional[Dict]]): Custom outputs, None for unmatched segments
+        segment_ids (Optional[Sequence]): Identifier per custom output, defaults to its position
+        confidence_threshold (Optional[float]): Drop form fields and table cells below this confidence
+
+    Returns:
+        Dict: 'summary' (one row per segment), 'forms' (segment, field, value, confidence)
+        and 'tables', a DataFrame per list-typed field (segment, row, column, value, confidence)
+    """
+    with span('transform.custom_outputs', segments=len(custom_outputs)):
+        return _transform_custom_outputs(custom_outputs, segment_ids, confidence_threshold)
+
+
+def _transform_custom_outputs(custom_outputs, segment_ids, confidence_threshold):
+    segment_ids = list(segment_ids) if segment_ids is not None else list(range(len(custom_outputs)))
+    summary = {'segment': [], 'page_indices': [], 'matched_blueprint_name': [],
+               'confidence': [], 'document_class_type': []}
+    forms = {'segment': [], 'field': [], 'value': [], 'confidence': []}
+    tables: Dict[str, Dict[str, List]] = {}
+
+    def add_form_value(segment, field, value, confidence_info):
+        if isinstance(value, dict):
+            for key, nested_value in value.items():
+                nested_info = confidence_info.get(key, {}) if isinstance(confidence_info, dict) else {}
+                add_form_value(segment, f'{field}.{key}', nested_value, nested_info)
+            return
+        forms['segment'].append(segment)
+        forms['field'].append(field)
+        forms['value'].append(value)
+        forms['confidence'].append(_confidence(confidence_info))
+
+    for segment, custom_output in zip(segment_ids, custom_outputs):
+        custom_output = custom_output or {}
+        matched_blueprint = custom_output.get('matched_blueprint', {})
+        summary['segment'].append(segment)
+        summary['page_indices'].append(custom_output.get('split_document', {}).get('page_indices'))
+        summary['matched_blueprint_name'].append(matched_blueprint.get('name'))
+        summary['confidence'].append(matched_blueprint.get('confidence'))
+        summary['document_class_type'].append(custom_output.get('document_class', {}).get('type'))
+
+        inference_result = custom_output.get('inference_result') or {}
+        explainability_info = (custom_output.get('explainability_info') or [{}])[0]
+        for field, value in inference_result.items():
+            confidence_data = explainability_info.get(field, {})
+            if not isinstance(value, list):
+                add_form_value(segment, field, value, confidence_data)
+                continue
+            table = tables.setdefault(field, {'segment': [], 'row': [], 'column': [], 'value': [], 'confidence': []})
+            for row, item in enumerate(value):
+                if not isinstance(item, dict):
+                    continue
+                row_info = confidence_data[row] if isinstance(confidence_data, list) and row < len(confidence_data) \
+                    else confidence_data
+                for column, cell in item.items():
+                    table['segment'].append(segment)
+                    table['row'].append(row)
+                    table['column'].append(column)
+                    table['value'].append(cell)
+                    table['confidence'].append(_confidence(row_info.get(column) if isinstance(row_info, dict) else None))
+
+    result = {
+        'summary': pd.DataFrame(summary),
+        'forms': pd.DataFrame(forms),
+        'tables': {field: pd.DataFrame(columns) for field, columns in tables.items()}
+    }
+    if confidence_threshold is not None:
+        result['forms'] = filter_by_confidence(result['forms'], confidence_threshold)
+        result['tables'] = {field: filter_by_confidence(df, confidence_threshold)
+                            for field, df in result['tables'].items()}
+    return result
+
+
+def filter_by_confidence(df: pd.DataFrame, threshold: float, keep_missing: bool = False) -> pd.DataFrame:
+    """Keep rows whose confidence is at least ``threshold`` (rows without a confidence only if ``keep_missing``)."""
+    confidence = pd.to_numeric(df['confidence'], errors='coerce')
+    mask = confidence >= threshold
+    if keep_missing:
+        mask |= confidence.isna()
+    return df[mask].reset_index(drop=True)
+
+
+def pivot_table_field(table: pd.DataFrame, with_confidence: bool = False) -> pd.DataFrame:
+    """Turn a long table from transform_custom_outputs into one row per (segment, row) and one column per field."""
+    wide = table.pivot(index=['segment', 'row'], columns='column', values='value')
+    if with_confidence:
+        confidence = table.pivot(index=['segment', 'row'], columns='column', values='confidence')
+        wide = wide.join(confidence, rsuffix='_confidence')
+    return wide.reset_index().rename_axis(columns=None)
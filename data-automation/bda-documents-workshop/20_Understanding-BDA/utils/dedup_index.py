@@ -0,0 +1,141 @@
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from .aws_clients import get_client
+from .helper_functions import get_bucket_and_key, get_blueprint_recommendation, invoke_blueprint_recommendation_async, wait_for_completion
+
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'bda-workshop', 'dedup.sqlite')
+
+
+def sha256_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_s3_object(s3_uri: str, s3_client=None, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of an S3 object's content.
+
+    Uses the SHA-256 checksum stored by S3 when the object was uploaded with
+    one, and otherwise streams the object through the hash.
+    """
+    s3_client = s3_client or get_client('s3')
+    bucket_name, object_key = get_bucket_and_key(s3_uri)
+    head = s3_client.head_object(Bucket=bucket_name, Key=object_key, ChecksumMode='ENABLED')
+    checksum = head.get('ChecksumSHA256')
+    # Multipart uploads store a checksum of part checksums ('<hash>-<parts>'), which is not the content hash
+    if checksum and '-' not in checksum and head.get('ChecksumType', 'FULL_OBJECT') == 'FULL_OBJECT':
+        return base64.b64decode(checksum).hex()
+    digest = hashlib.sha256()
+    body = s3_client.get_object(Bucket=bucket_name, Key=object_key)['Body']
+    for chunk in body.iter_chunks(chunk_size):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DedupIndex:
+    """
+    Content-addressed record of earlier BDA results.
+
+    Entries are keyed by the SHA-256 of the input document together with the
+    configuration it was processed with (project, blueprints, stage, ...), so a
+    byte-identical document sent with the same configuration can reuse the
+    earlier job_metadata instead of invoking BDA again. Include anything that
+    changes the output, such as a project version, in the configuration.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' key TEXT PRIMARY KEY, kind TEXT, document_sha256 TEXT,'
+                ' config TEXT, result TEXT, created_at REAL)')
+
+    @staticmethod
+    def key(kind: str, document_sha256: str, config: Optional[Dict] = None) -> str:
+        canonical = json.dumps(config or {}, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(f'{kind}\n{document_sha256}\n{canonical}'.encode('utf-8')).hexdigest()
+
+    def get(self, kind: str, document_sha256: str, config: Optional[Dict] = None) -> Optional[Dict]:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT result FROM results WHERE key = ?',
+                (self.key(kind, document_sha256, config),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, kind: str, document_sha256: str, config: Optional[Dict], result: Dict):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                (self.key(kind, document_sha256, config), kind, document_sha256,
+                 json.dumps(config or {}, sort_keys=True), json.dumps(result, default=str), time.time()))
+
+    def remove(self, kind: str, document_sha256: str, config: Optional[Dict] = None):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM results WHERE key = ?',
+                                     (self.key(kind, document_sha256, config),))
+
+    def close(self):
+        self._connection.close()
+
+
+def data_automation_config(project_arn=None, blueprint_arns=None, stage='LIVE', extra_config=None) -> Dict:
+    """Configuration part of the dedup key for an invoke_data_automation_async call."""
+    return {
+        'project_arn': project_arn,
+        'blueprint_arns': sorted(blueprint_arns or []),
+        'stage': stage,
+        'extra': extra_config or {}
+    }
+
+
+def recommend_blueprint(bda_client, region_name: str, input_s3_uri: str,
+                        dedup_index: Optional[DedupIndex] = None, document_sha256: Optional[str] = None,
+                        polling_policy=None) -> Dict:
+    """
+    Run a blueprint recommendation, reusing an earlier result for identical content.
+
+    Args:
+        bda_client: bedrock-data-automation client
+        region_name (str): AWS region
+        input_s3_uri (str): S3 URI of the sample document
+        dedup_index (Optional[DedupIndex]): Index to consult and record into
+        document_sha256 (Optional[str]): Content hash if already known, e.g. from sha256_file
+        polling_policy: PollingPolicy for waiting on the recommendation job
+
+    Returns:
+        Dict: The completed get_blueprint_recommendation response
+    """
+    dedup_index = dedup_index or DedupIndex()
+    document_sha256 = document_sha256 or sha256_s3_object(input_s3_uri)
+    cached = dedup_index.get('blueprint_recommendation', document_sha256)
+    if cached:
+        print(f'Reusing blueprint recommendation for identical content of {input_s3_uri}')
+        return cached
+
+    payload = json.dumps({"inputDataConfiguration": {"s3Uri": input_s3_uri}})
+    job_id = invoke_blueprint_recommendation_async(bda_client, region_name, payload)['jobId']
+    status_response = wait_for_completion(
+        client=None,
+        get_status_function=get_blueprint_recommendation,
+        status_kwargs={'bda_client': bda_client, 'region_name': region_name, 'job_id': job_id},
+        status_path_in_response='status',
+        completion_states=['Completed'],
+        error_states=['ClientError', 'ServiceError'],
+        polling_policy=polling_policy
+    )
+    dedup_index.put('blueprint_recommendation', document_sha256, None, status_response)
+    return status_response
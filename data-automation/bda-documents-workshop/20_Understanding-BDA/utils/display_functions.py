@@ -1,17 +1,46 @@
 import ipywidgets as widgets
 from IPython.display import display, HTML, JSON
 from PIL import Image
+import html
 import io
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlparse
 import pandas as pd
+
+from .aws_clients import get_client
+from .helper_functions import generate_presigned_url, generate_presigned_urls
+from .instrumentation import traced
+from .s3_cache import get_default_cache
   
 
 
-def load_image(image_path):
+def load_image(image_path, max_size=None):
+    """
+    JPEG bytes of an image file, optionally downscaled to fit ``max_size``.
+
+    Results are cached by path, modification time and size, so showing the
+    same page again does not decode and re-encode it.
+    """
+    stat = os.stat(image_path)
+    return _load_image(os.path.realpath(image_path), stat.st_mtime_ns, stat.st_size, max_size)
+
+
+@lru_cache(maxsize=64)
+def _load_image(image_path, mtime_ns, file_size, max_size):
     # Open the image
     img = Image.open(image_path)
     
-    # Convert to JPEG if it's not already
-    if img.format != 'JPEG':
+    # Convert to JPEG if it's not already, or if a thumbnail was requested
+    if img.format != 'JPEG' or (max_size is not None and max(img.size) > max_size):
+        if max_size is not None:
+            img.thumbnail((max_size, max_size))
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
         # Create a byte stream
         buf = io.BytesIO() 
         # Save as JPEG to the byte stream
@@ -25,6 +54,97 @@ def load_image(image_path):
     
     return image_bytes
 
+class PageImageLoader:
+    """
+    Page images fetched on demand from S3 (or local paths) with a bounded LRU cache.
+
+    ``get(i)`` returns the bytes of page ``i``, downloading it only on first
+    use. ``prefetch`` queues pages on a small shared thread pool so that the
+    next and previous pages are usually cached before they are shown. The
+    cache is shared by all loaders and holds at most ``max_cached`` images.
+    """
+
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _executor = None
+    max_cached = 64
+
+    def __init__(self, image_uris, s3_client=None, max_size=None):
+        if isinstance(image_uris, str):
+            image_uris = [image_uris]
+        self.image_uris = [uri for uri in image_uris if uri]
+        self.s3_client = s3_client
+        self.max_size = max_size
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.image_uris)
+
+    @classmethod
+    def _executor_instance(cls):
+        with cls._cache_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=4)
+            return cls._executor
+
+    def _fetch(self, uri):
+        if not uri.startswith('s3://'):
+            return load_image(uri, max_size=self.max_size)
+        s3_client = self.s3_client or get_client('s3')
+        cache = get_default_cache()
+        if cache:
+            image_bytes = cache.get_bytes(uri, s3_client)
+        else:
+            parsed_uri = urlparse(uri)
+            image_bytes = s3_client.get_object(Bucket=parsed_uri.netloc,
+                                               Key=parsed_uri.path.lstrip('/'))['Body'].read()
+        if self.max_size is not None:
+            img = Image.open(io.BytesIO(image_bytes))
+            if max(img.size) > self.max_size:
+                img.thumbnail((self.max_size, self.max_size))
+                buf = io.BytesIO()
+                img.convert('RGB').save(buf, format='JPEG')
+                image_bytes = buf.getvalue()
+        return image_bytes
+
+    def _load(self, key):
+        image_bytes = self._fetch(key[0])
+        with self._cache_lock:
+            self._cache[key] = image_bytes
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return image_bytes
+
+    def _submit(self, page_index):
+        key = (self.image_uris[page_index], self.max_size)
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        with self._pending_lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor_instance().submit(self._load, key)
+                self._pending[key] = future
+                future.add_done_callback(lambda _: self._pending.pop(key, None))
+            return future
+
+    def get(self, page_index):
+        result = self._submit(page_index)
+        return result if isinstance(result, bytes) else result.result()
+
+    def prefetch(self, page_indices):
+        for page_index in page_indices:
+            if 0 <= page_index < len(self.image_uris):
+                self._submit(page_index)
+
+
+def _image_format(image_bytes):
+    return 'jpeg' if image_bytes[:2] == b'\xff\xd8' else 'png'
+
+
 def onclick_function():
     return """
         <script>
@@ -59,9 +179,8 @@ def onclick_function():
         </script>
     """
 
-def create_form_view(forms_data):
-    """Create a formatted view for key-value pairs with nested dictionary support"""
-    html_content = """
+
+FORM_VIEW_STYLE = """
     <style>
         .kv-container {
             display: flex;
@@ -123,64 +242,142 @@ def create_form_view(forms_data):
             font-weight: 600;
             margin-bottom: 2px;
         }
-    </style>       
+    </style>
+"""
+
+
+def deferred_sections_view(content_html, deferred):
     """
+    ``content_html`` followed by a selector for the sections left out of it.
+
+    ``deferred`` holds (label, render) pairs; ``render()`` returns the
+    section's HTML and its own deferred sections. A section is only rendered
+    when it is opened, so sections never looked at are never serialized.
+    """
+    sections = dict(deferred)
+    selector = widgets.Dropdown(options=list(sections), description='Collapsed',
+                                layout=widgets.Layout(width='70%'))
+    open_button = widgets.Button(description='Show', layout=widgets.Layout(width='90px'))
+    section_html = widgets.HTML()
+
+    def open_section(_):
+        label = selector.value
+        if label is None:
+            return
+        section_html.value, more = sections[label]()
+        for more_label, render in more:
+            sections.setdefault(more_label, render)
+        selector.options = list(sections)
+        selector.value = label
 
-    html_content += onclick_function()
-    html_content += '<div class="kv-container">'
-
-    def render_nested_dict(data, level=0):
-        nested_html = ""
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, dict):
-                    confidence = value.get('confidence', 0) * 100
-                    if 'value' in value:
-                        # Handle standard key-value pair with confidence
-                        nested_html += f"""
-                            <div class='kv-box'>
-                                <div class='kv-item'>
-                                    <div class='key'>{key}</div>
-                                </div>
-                                <div class='kc-item' onclick=handleClick(event) data-bbox='(10,40,110,200)'>
-                                    <div class="value" >{value['value']}</div>
-                                    <div class='confidence'>{confidence:.1f}%</div>
-                                </div>
-                            </div>
-                        """
-                    else:
-                        # Handle nested dictionary
-                        nested_html += f"""
-                            <div class='kv-box'>
-                                <div class='kv-item'>
-                                    <div class='key'>{key}</div>
-                                </div>
-                                <div class="nested-container">
-                                    {render_nested_dict(value, level + 1)}
-                                </div>
-                            </div>
-                        """
-                else:
-                    # Handle direct key-value pairs without confidence
-                    nested_html += f"""
-                        <div class='kv-box'>
-                            <div class='kv-item'>
-                                <div class='key'>{key}</div>
-                            </div>
-                            <div class="value">{value}</div>
+    open_button.on_click(open_section)
+    return widgets.VBox([widgets.HTML(content_html), widgets.HBox([selector, open_button]), section_html])
+
+
+def _form_section(data, path, max_depth, max_items, start=0):
+    def render():
+        out, deferred = [FORM_VIEW_STYLE, '<div class="kv-container">'], []
+        _render_form_entries(data, out, deferred, path, max_depth, max_items, start)
+        out.append('</div>')
+        return ''.join(out), deferred
+    return render
+
+
+def _render_form_entries(data, out, deferred, path, max_depth, max_items, start=0):
+    # Explicit stack writing into one list: linear in the size of what is rendered at any depth.
+    # Dictionaries at max_depth and entries past max_items are not rendered here; each is added
+    # to ``deferred`` with a function that renders it when it is opened
+    stack = [(data, 0, path, start)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+            continue
+        data, level, path, start = item
+        pending = []
+        for count, (key, value) in enumerate(itertools.islice(data.items(), start, None)):
+            if max_items is not None and count == max_items:
+                rest = start + max_items
+                label = f"{path or 'top level'} (entries {rest + 1}-{len(data)})"
+                deferred.append((label, _form_section(data, path, max_depth, max_items, rest)))
+                pending.append(f"<div class='kv-box'><div class='value'>&hellip; {len(data) - rest} more, "
+                               f"see &quot;{html.escape(label)}&quot; below</div></div>")
+                break
+            child_path = f'{path} › {key}' if path else str(key)
+            key = html.escape(str(key))
+            if isinstance(value, dict) and 'value' in value:
+                # Handle standard key-value pair with confidence
+                confidence = (value.get('confidence') or 0) * 100
+                pending.append(f"""
+                    <div class='kv-box'>
+                        <div class='kv-item'>
+                            <div class='key'>{key}</div>
+                        </div>
+                        <div class='kc-item' onclick=handleClick(event) data-bbox='(10,40,110,200)'>
+                            <div class="value" >{html.escape(str(value['value']))}</div>
+                            <div class='confidence'>{confidence:.1f}%</div>
+                        </div>
+                    </div>
+                """)
+            elif isinstance(value, dict) and value and max_depth is not None and level + 1 >= max_depth:
+                # Collapsed below max_depth: rendered only when opened
+                deferred.append((child_path, _form_section(value, child_path, max_depth, max_items)))
+                pending.append(f"""
+                    <div class='kv-box'>
+                        <div class='kv-item'>
+                            <div class='key'>{key}</div>
                         </div>
-                    """
-        return nested_html
+                        <div class="value">{len(value)} fields, see &quot;{html.escape(child_path)}&quot; below</div>
+                    </div>
+                """)
+            elif isinstance(value, dict):
+                # Handle nested dictionary
+                pending.append(f"""
+                    <div class='kv-box'>
+                        <div class='kv-item'>
+                            <div class='key'>{key}</div>
+                        </div>
+                        <div class="nested-container">
+                """)
+                pending.append((value, level + 1, child_path, 0))
+                pending.append("""
+                        </div>
+                    </div>
+                """)
+            else:
+                # Handle direct key-value pairs without confidence
+                pending.append(f"""
+                    <div class='kv-box'>
+                        <div class='kv-item'>
+                            <div class='key'>{key}</div>
+                        </div>
+                        <div class="value">{html.escape(str(value))}</div>
+                    </div>
+                """)
+        stack.extend(reversed(pending))
 
-    html_content += render_nested_dict(forms_data)
-    html_content += "</div>"
-    
-    return HTML(html_content)
+
+@traced('display.create_form_view')
+def create_form_view(forms_data, max_depth=4, max_items=500):
+    """
+    Create a formatted view for key-value pairs with nested dictionary support.
+
+    Values are HTML-escaped. Nested dictionaries at ``max_depth`` and below,
+    and entries past the first ``max_items`` of a dictionary, are left out of
+    the initial HTML; they are listed in a selector underneath and rendered
+    only when opened. Returns plain HTML when nothing is left out.
+    """
+    parts = [FORM_VIEW_STYLE, onclick_function(), '<div class="kv-container">']
+    deferred = []
+    _render_form_entries(forms_data, parts, deferred, '', max_depth, max_items)
+    parts.append('</div>')
+    html_content = ''.join(parts)
+    if not deferred:
+        return HTML(html_content)
+    return deferred_sections_view(html_content, deferred)
 
 
-def create_table_view(tables_data):
-    """Create a formatted view for tables"""
-    html_content = """
+TABLE_VIEW_STYLE = """
     <style>
         .table-container {
             margin: 20px;
@@ -204,18 +401,141 @@ def create_table_view(tables_data):
         }
     </style>
     """
-    
-    for table_name, table_data in tables_data.items():
-        if table_data:
-            df = pd.DataFrame(table_data)
-            html_content += f"""
+
+
+def paged_table_view(df, page_size=50, title=None):
+    """
+    Show a DataFrame one page of rows at a time.
+
+    Only the rows of the current page are rendered and sent to the front end;
+    the Previous / Next buttons render the neighbouring page on demand.
+    """
+    page_count = max(1, -(-len(df) // page_size))
+    page = {'index': 0}
+    table_html = widgets.HTML()
+    previous_button = widgets.Button(description='Previous', layout=widgets.Layout(width='90px'))
+    next_button = widgets.Button(description='Next', layout=widgets.Layout(width='90px'))
+    position = widgets.Label()
+
+    def render():
+        start = page['index'] * page_size
+        window = df.iloc[start:start + page_size]
+        heading = f'<h3>{html.escape(str(title))}</h3>' if title is not None else ''
+        table_html.value = f"""
             <div class="table-container">
-                <h3>{table_name}</h3>
-                {df.to_html(classes='table-view', index=False)}
+                {heading}
+                {window.to_html(classes='table-view', index=False)}
             </div>
-            """
-    
-    return HTML(html_content)
+        """
+        position.value = f'Rows {start + 1 if len(df) else 0}-{start + len(window)} of {len(df)}'
+        previous_button.disabled = page['index'] == 0
+        next_button.disabled = page['index'] >= page_count - 1
+
+    def turn(step):
+        page['index'] = min(max(page['index'] + step, 0), page_count - 1)
+        render()
+
+    previous_button.on_click(lambda _: turn(-1))
+    next_button.on_click(lambda _: turn(1))
+    render()
+    if page_count == 1:
+        return widgets.VBox([table_html])
+    return widgets.VBox([table_html, widgets.HBox([previous_button, next_button, position])])
+
+
+@traced('display.create_table_view')
+def create_table_view(tables_data, page_size=50):
+    """Create a formatted view for tables, paging through tables longer than ``page_size`` rows"""
+    views = [widgets.HTML(TABLE_VIEW_STYLE)]
+    for table_name, table_data in tables_data.items():
+        if table_data:
+            views.append(paged_table_view(pd.DataFrame(table_data), page_size=page_size, title=table_name))
+    return widgets.VBox(views)
+
+
+@traced('display.windowed_html_view')
+def windowed_html_view(data, window=20000, expanded=True, bg_color='#f0f0f0'):
+    """
+    Collapsible <pre> view of a long string that renders ``window`` characters at a time.
+
+    Only the current window, broken at a line end, is sent to the front end;
+    the Previous / Next buttons render the neighbouring window on demand.
+    """
+    text = str(data)
+    # Start offset of every window reached so far; the next one is found when first needed
+    starts = [0]
+    page = {'index': 0}
+    content = widgets.HTML()
+    previous_button = widgets.Button(description='Previous', layout=widgets.Layout(width='90px'))
+    next_button = widgets.Button(description='Next', layout=widgets.Layout(width='90px'))
+    position = widgets.Label()
+    toggle_button = widgets.Button(description='Collapse' if expanded else 'Expand')
+    navigation = widgets.HBox([previous_button, next_button, position])
+    body = widgets.VBox([content, navigation], layout=widgets.Layout(display=None if expanded else 'none'))
+
+    def window_end(start):
+        end = min(start + window, len(text))
+        line_end = text.rfind('\n', start, end)
+        return end if end == len(text) or line_end <= start else line_end + 1
+
+    def render():
+        start = starts[page['index']]
+        end = window_end(start)
+        if page['index'] == len(starts) - 1 and end < len(text):
+            starts.append(end)
+        content.value = f'<div style="background-color: {bg_color}; padding: 10px; border-radius: 5px;">' \
+                        f'<pre class="json-content">{text[start:end]}</pre></div>'
+        position.value = f'Characters {start + 1:,}-{end:,} of {len(text):,}'
+        previous_button.disabled = page['index'] == 0
+        next_button.disabled = end >= len(text)
+        navigation.layout.display = None if len(starts) > 1 else 'none'
+
+    def turn(step):
+        page['index'] = min(max(page['index'] + step, 0), len(starts) - 1)
+        render()
+
+    def toggle(_):
+        collapsed = body.layout.display == 'none'
+        body.layout.display = None if collapsed else 'none'
+        toggle_button.description = 'Collapse' if collapsed else 'Expand'
+
+    previous_button.on_click(lambda _: turn(-1))
+    next_button.on_click(lambda _: turn(1))
+    toggle_button.on_click(toggle)
+    render()
+    view = widgets.VBox([toggle_button, body])
+    view.add_class('custom-json-output')
+    return view
+
+
+@traced('display.display_html')
+def display_html(data, root='root', expanded=True, bg_color='#f0f0f0', window=20000):
+    if window is not None and len(str(data)) > window:
+        # Large payloads are shown a window at a time instead of in one <pre>
+        display(windowed_html_view(data, window=window, expanded=expanded, bg_color=bg_color))
+        return
+    html_content = f"""
+        <div class="custom-json-output" style="background-color: {bg_color}; padding: 10px; border-radius: 5px;">
+            <button class="toggle-btn" style="margin-bottom: 10px;">{'Collapse' if expanded else 'Expand'}</button>
+            <pre class="json-content" style="display: {'block' if expanded else 'none'};">{data}</pre>
+        </div>
+        <script>
+        (function() {{
+            var toggleBtn = document.currentScript.previousElementSibling.querySelector('.toggle-btn');
+            var jsonContent = document.currentScript.previousElementSibling.querySelector('.json-content');
+            toggleBtn.addEventListener('click', function() {{
+                if (jsonContent.style.display === 'none') {{
+                    jsonContent.style.display = 'block';
+                    toggleBtn.textContent = 'Collapse';
+                }} else {{
+                    jsonContent.style.display = 'none';
+                    toggleBtn.textContent = 'Expand';
+                }}
+            }});
+        }})();
+        </script>
+        """
+    display(HTML(html_content))
 
 
 def get_view(data, display_function=None):
@@ -228,7 +548,16 @@ def get_view(data, display_function=None):
     return out
 
 
-def segment_view(document_image_uris, inference_result):
+@traced('display.segment_view')
+def segment_view(document_image_uris, inference_result, s3_client=None, max_image_size=None):
+    """
+    Page images of a segment next to its key-value pairs and tables.
+
+    Only the page being shown is downloaded; the previous and next pages are
+    prefetched in the background. ``document_image_uris`` are S3 URIs (e.g.
+    each page's ``asset_metadata.rectified_image``) or local paths.
+    """
+    loader = PageImageLoader(document_image_uris, s3_client=s3_client, max_size=max_image_size)
     # Create the layout with top alignment
     main_hbox_layout = widgets.Layout(
         width='100%',
@@ -243,9 +572,30 @@ def segment_view(document_image_uris, inference_result):
         width='auto',
         height='auto'
     )
-    image_widget.value = load_image(image_path=document_image_uri)
+    previous_button = widgets.Button(description='Previous', layout=widgets.Layout(width='90px'))
+    next_button = widgets.Button(description='Next', layout=widgets.Layout(width='90px'))
+    page_label = widgets.Label()
+    page = {'index': 0}
+
+    def show_page(page_index):
+        page['index'] = page_index
+        previous_button.disabled = page_index == 0
+        next_button.disabled = page_index >= len(loader) - 1
+        if not len(loader):
+            page_label.value = 'No page images'
+            return
+        page_label.value = f'Page {page_index + 1} of {len(loader)}'
+        image_bytes = loader.get(page_index)
+        image_widget.format = _image_format(image_bytes)
+        image_widget.value = image_bytes
+        loader.prefetch([page_index + 1, page_index - 1])
+
+    previous_button.on_click(lambda _: show_page(max(page['index'] - 1, 0)))
+    next_button.on_click(lambda _: show_page(min(page['index'] + 1, len(loader) - 1)))
+    show_page(0)
+    page_controls = [widgets.HBox([previous_button, next_button, page_label])] if len(loader) > 1 else []
     image_container = widgets.VBox(
-        children=[image_widget],
+        children=[image_widget] + page_controls,
         layout=widgets.Layout(
             border='1px solid #888',
             padding='1px',
@@ -332,4 +682,68 @@ def display_multiple(views, view_titles = None):
         main_tab.children = (*main_tab.children, view)
         tab_title = view_titles[i] if view_titles and view_titles[i] else f'Document {i}'
         main_tab.set_title(i, title=tab_title)
-    display(main_tab)
\ No newline at end of file
+    display(main_tab)
+
+
+def _image_html(presigned_url, width):
+    if presigned_url:
+        return f'<img src="{presigned_url}" style="width: {width}; object-fit: contain;">'
+    return ''
+
+def _first_image_uri(s3_uri):
+    if type(s3_uri)==list:
+        s3_uri = s3_uri[0] if s3_uri else None
+    if s3_uri is None or pd.isna(s3_uri):
+        return None
+    return s3_uri
+
+def create_image_html_column(row: pd.Series, image_col: str, width: str = '300px') -> str:
+    """
+    Create HTML embedded image from S3 URI using presigned URL for a DataFrame row.
+    
+    Args:
+        row (pd.Series): DataFrame row
+        image_col (str): Name of column containing S3 URI
+        width (str): Fixed width for image
+        
+    Returns:
+        str: HTML string for embedded image
+    """
+    s3_uri = _first_image_uri(row[image_col])
+    if s3_uri is None:
+        return ''
+    return _image_html(generate_presigned_url(s3_uri), width)
+
+def add_embedded_images(df: pd.DataFrame, image_col: str, width: str = '300px',
+                        expiration: int = 3600) -> pd.Series:
+    """
+    Create HTML embedded images for a whole DataFrame column in one pass.
+
+    All S3 URIs are signed together with one client, and URLs signed earlier
+    are reused from the cache until shortly before they expire.
+    
+    Args:
+        df (pd.DataFrame): DataFrame with an image column, e.g. 'crop_images'
+        image_col (str): Name of column containing S3 URIs (or lists of them)
+        width (str): Fixed width for image
+        expiration (int): URL expiration time in seconds
+        
+    Returns:
+        pd.Series: HTML strings aligned with ``df.index``
+    """
+    s3_uris = [_first_image_uri(value) for value in df[image_col]]
+    unique_uris = list(dict.fromkeys(uri for uri in s3_uris if uri is not None))
+    url_by_uri = dict(zip(unique_uris, generate_presigned_urls(unique_uris, expiration)))
+    return pd.Series([_image_html(url_by_uri.get(uri), width) if uri else '' for uri in s3_uris],
+                     index=df.index, dtype=object)
+
+
+# Example usage:
+"""
+# Add embedded images column
+df['embedded_images'] = add_embedded_images(df, 'crop_images', width='300px')
+
+# For Jupyter notebook display:
+from IPython.display import HTML
+HTML(df['embedded_images'].iloc[0])
+"""
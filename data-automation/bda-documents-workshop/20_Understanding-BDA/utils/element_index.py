@@ -0,0 +1,125 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+BBox = Tuple[float, float, float, float]
+
+
+def _bbox(bounding_box: Dict) -> BBox:
+    """(left, top, right, bottom) of a BDA bounding_box in normalized page coordinates."""
+    left = bounding_box.get('left', 0)
+    top = bounding_box.get('top', 0)
+    return left, top, left + bounding_box.get('width', 0), top + bounding_box.get('height', 0)
+
+
+def _element_locations(element: Dict):
+    """(page_index, bbox) of every location of an element."""
+    for location in element.get('locations') or []:
+        if 'page_index' in location and location.get('bounding_box'):
+            yield int(location['page_index']), _bbox(location['bounding_box'])
+
+
+class ElementIndex:
+    """
+    Lookup structure over the elements of one standard output.
+
+    Built once in a single pass, it answers "elements on page 2", "TABLE
+    elements" or "TEXT elements on page 2" with a dict lookup, and bounding box
+    queries within a page through a uniform grid over the normalized page, so
+    only elements in the overlapping cells are tested. All results are the
+    original element dicts (no copies), ordered by reading_order.
+
+    Example:
+        index = ElementIndex(standard_output)
+        index.on_page(2, 'TEXT')
+        index.at(0, 0.42, 0.17)  # elements under a clicked point
+    """
+
+    def __init__(self, standard_output: Dict, grid_size: int = 32):
+        """
+        Args:
+            standard_output (Dict): Parsed standard output (or any dict with an 'elements' list)
+            grid_size (int): Cells per side of the spatial grid on each page
+        """
+        self.elements: List[Dict] = sorted(standard_output.get('elements', []),
+                                           key=lambda element: element.get('reading_order', 0))
+        self.grid_size = grid_size
+        self._by_page = defaultdict(list)
+        self._by_type = defaultdict(list)
+        self._by_page_type = defaultdict(list)
+        self._by_id = {}
+        # page -> {(column, row): [(element_position, bbox), ...]}
+        self._grid = defaultdict(lambda: defaultdict(list))
+
+        for position, element in enumerate(self.elements):
+            element_type = element.get('type')
+            self._by_type[element_type].append(element)
+            if 'id' in element:
+                self._by_id[element['id']] = element
+            for page in element.get('page_indices') or []:
+                self._by_page[page].append(element)
+                self._by_page_type[(page, element_type)].append(element)
+            for page, bbox in _element_locations(element):
+                cells = self._grid[page]
+                for cell in self._cells(bbox):
+                    cells[cell].append((position, bbox))
+
+    def _cells(self, bbox: BBox) -> Iterable[Tuple[int, int]]:
+        last = self.grid_size - 1
+        left, top, right, bottom = bbox
+        first_column = min(max(int(left * self.grid_size), 0), last)
+        last_column = min(max(int(right * self.grid_size), 0), last)
+        first_row = min(max(int(top * self.grid_size), 0), last)
+        last_row = min(max(int(bottom * self.grid_size), 0), last)
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                yield column, row
+
+    def get(self, element_id: str) -> Optional[Dict]:
+        """Element with the given id, or None."""
+        return self._by_id.get(element_id)
+
+    def on_page(self, page_index: int, element_type: Optional[str] = None) -> List[Dict]:
+        """Elements on a page, optionally of one type ('TEXT', 'TABLE', 'FIGURE', ...)."""
+        if element_type is None:
+            return self._by_page.get(page_index, [])
+        return self._by_page_type.get((page_index, element_type), [])
+
+    def of_type(self, element_type: str) -> List[Dict]:
+        """Elements of one type across all pages."""
+        return self._by_type.get(element_type, [])
+
+    def pages(self) -> List[int]:
+        """Page indices that have at least one element."""
+        return sorted(self._by_page)
+
+    def query(self, page_index: int, bbox: BBox, element_type: Optional[str] = None) -> List[Dict]:
+        """
+        Elements on a page whose bounding box intersects ``bbox``.
+
+        Args:
+            page_index (int): Page to search
+            bbox (BBox): (left, top, right, bottom) in normalized page coordinates
+            element_type (Optional[str]): Only return elements of this type
+
+        Returns:
+            List[Dict]: Matching elements in reading order
+        """
+        cells = self._grid.get(page_index)
+        if not cells:
+            return []
+        left, top, right, bottom = bbox
+        matches = set()
+        for cell in self._cells(bbox):
+            for position, (e_left, e_top, e_right, e_bottom) in cells.get(cell, ()):
+                if position not in matches and e_left <= right and left <= e_right \
+                        and e_top <= bottom and top <= e_bottom:
+                    matches.add(position)
+        elements = (self.elements[position] for position in sorted(matches))
+        if element_type is None:
+            return list(elements)
+        return [element for element in elements if element.get('type') == element_type]
+
+    def at(self, page_index: int, x: float, y: float, element_type: Optional[str] = None) -> List[Dict]:
+        """Elements on a page that contain the point (x, y), e.g. for a click on the page image."""
+        return self.query(page_index, (x, y, x, y), element_type)
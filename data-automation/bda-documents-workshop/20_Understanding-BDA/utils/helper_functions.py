@@ -1,20 +1,36 @@
 import os
+import threading
 import time
-import boto3
 from urllib.parse import urlparse
-import requests
-import io
-from PyPDF2 import PdfReader, PdfWriter
+import tempfile
 from botocore.exceptions import ClientError
-from IPython.display import HTML
-from IPython.display import display
-from botocore.auth import SigV4Auth
-from botocore.awsrequest import AWSRequest
 import json
+from typing import Iterable, List, Optional
 
+from .aws_clients import get_client
+from .blueprint_registry import get_blueprint_registry
+from .instrumentation import current_span, span, traced
+from .polling import PollingPolicy
+from .s3_cache import get_default_cache
+from .signed_transport import get_signed_transport
 
-bda_client = boto3.client('bedrock-data-automation')
-bda_runtime_client = boto3.client('bedrock-data-automation-runtime')
+
+_DISPLAY_NAMES = ('display_html', 'create_image_html_column', 'add_embedded_images')
+
+
+def __getattr__(name):
+    # bda_client and bda_runtime_client used to be created at import time;
+    # they are now resolved lazily through the shared client registry.
+    if name == 'bda_client':
+        return get_client('bedrock-data-automation')
+    if name == 'bda_runtime_client':
+        return get_client('bedrock-data-automation-runtime')
+    if name in _DISPLAY_NAMES:
+        # Notebook display helpers live in display_functions so that importing
+        # this module does not load IPython, pandas or ipywidgets
+        from . import display_functions
+        return getattr(display_functions, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_bucket_and_key(s3_uri):
     parsed_uri = urlparse(s3_uri)
@@ -22,155 +38,212 @@ def get_bucket_and_key(s3_uri):
     object_key = parsed_uri.path.lstrip('/')
     return (bucket_name, object_key)
 
-def wait_for_job_to_complete(invocationArn):
-    get_status_response = bda_runtime_client.get_data_automation_status(
-         invocationArn=invocationArn)
-    status = get_status_response['status']
+def wait_for_job_to_complete(invocationArn, polling_policy=None, timeline=None):
+    polling_policy = polling_policy or PollingPolicy()
     job_id = invocationArn.split('/')[-1]
-    max_iterations = 60
-    iteration_count = 0
-    while status not in ['Success', 'ServiceError', 'ClientError']:
-        print(f'Waiting for Job to Complete. Current status is {status}')
-        time.sleep(10)
-        iteration_count += 1
-        if iteration_count >= max_iterations:
-            print(f"Maximum number of iterations ({max_iterations}) reached. Breaking the loop.")
-            break
-        get_status_response = bda_runtime_client.get_data_automation_status(
-         invocationArn=invocationArn)
-        status = get_status_response['status']
-    if iteration_count >= max_iterations:
-        raise Exception("Job did not complete within the expected time frame.")
-    else:
-        print(f"Invocation Job with id {job_id} completed. Status is {status}")
+    with span('bda.wait_for_job', job_id=job_id) as job_span:
+        try:
+            get_status_response = polling_policy.poll(
+                get_status=lambda: get_client('bedrock-data-automation-runtime').get_data_automation_status(
+                    invocationArn=invocationArn),
+                status_of=lambda response: response['status'],
+                terminal_states=['Success', 'ServiceError', 'ClientError'],
+                timeline=timeline,
+                on_wait=lambda status, wait: print(f'Waiting for Job to Complete. Current status is {status}'))
+        except TimeoutError:
+            print(f"Deadline of {polling_policy.deadline}s reached. Breaking the loop.")
+            raise Exception("Job did not complete within the expected time frame.")
+        job_span.set('status', get_status_response['status'])
+    print(f"Invocation Job with id {job_id} completed. Status is {get_status_response['status']}")
     return get_status_response
 
 
-def read_s3_object(s3_uri):
+def read_s3_object(s3_uri, s3_client=None, cache=None):
     # Parse the S3 URI
     parsed_uri = urlparse(s3_uri)
     bucket_name = parsed_uri.netloc
     object_key = parsed_uri.path.lstrip('/')
-    # Create an S3 client
-    s3_client = boto3.client('s3')
+    s3_client = s3_client or get_client('s3')
+    cache = cache or get_default_cache()
+    with span('s3.read_object', s3_uri=s3_uri, cached=bool(cache)) as read_span:
+        try:
+            if cache:
+                content = cache.get_bytes(s3_uri, s3_client)
+            else:
+                # Get the object from S3
+                response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
+
+                # Read the content of the object
+                content = response['Body'].read()
+            read_span.set('bytes', len(content))
+            return content.decode('utf-8')
+        except Exception as e:
+            read_span.set('error', str(e))
+            print(f"Error reading S3 object: {e}")
+            return None
+
+def read_s3_json(s3_uri, s3_client=None, cache=None):
+    """Read and parse a JSON object from S3, using the parsed-object tier of the cache if enabled."""
+    s3_client = s3_client or get_client('s3')
+    cache = cache or get_default_cache()
+    if not cache:
+        content = read_s3_object(s3_uri, s3_client=s3_client)
+        return json.loads(content) if content is not None else None
+    with span('s3.read_json', s3_uri=s3_uri, cached=True) as read_span:
+        try:
+            return cache.get_json(s3_uri, s3_client)
+        except Exception as e:
+            read_span.set('error', str(e))
+            print(f"Error reading S3 object: {e}")
+            return None
+
+def stream_download(url, output_file_path, chunk_size=1024 * 1024, max_retries=3, timeout=60):
+    """
+    Stream ``url`` to ``output_file_path`` without holding the body in memory.
+
+    Data is written to ``<output_file_path>.part`` first; if that file already
+    exists (an earlier attempt was interrupted), the download resumes from its
+    current size with an HTTP Range request.
+    """
+    import requests
+
+    part_file_path = f'{output_file_path}.part'
+    for attempt in range(max_retries + 1):
+        offset = os.path.getsize(part_file_path) if os.path.exists(part_file_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416:
+                    # Requested range starts at the end: the previous attempt already got everything
+                    break
+                response.raise_for_status()
+                # A 200 means the server ignored the Range header, so start over
+                mode = 'ab' if response.status_code == 206 else 'wb'
+                with open(part_file_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+            break
+        except requests.RequestException as e:
+            if attempt == max_retries:
+                raise
+            print(f"Download of {url} interrupted ({e}), resuming")
+            time.sleep(2 ** attempt)
+    os.replace(part_file_path, output_file_path)
+    return output_file_path
+
+def _page_range(start_page_index, end_page_index, page_count):
+    # Both ends are inclusive and clamped to the document
+    start_page_index = 0 if start_page_index is None else max(start_page_index, 0)
+    end_page_index = page_count - 1 if end_page_index is None else min(end_page_index, page_count - 1)
+    return range(start_page_index, end_page_index + 1)
+
+def download_document_slices(url, page_ranges, output_file_paths, source_file_path=None, keep_source=False):
+    """
+    Download a PDF once and write several page-range slices from it.
+
+    Args:
+        url (str): URL of the PDF
+        page_ranges (list): (start_page_index, end_page_index) tuples, inclusive and 0-indexed;
+            None for either end means the start / end of the document
+        output_file_paths (list): One output path per page range
+        source_file_path (str): Where to keep the downloaded PDF, defaults to a temporary file
+        keep_source (bool): Keep the downloaded PDF after slicing
+
+    Returns:
+        list: The written output paths
+    """
+    from PyPDF2 import PdfReader, PdfWriter
+
+    if source_file_path is None:
+        fd, source_file_path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
     try:
-        # Get the object from S3
-        response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
-        
-        # Read the content of the object
-        content = response['Body'].read().decode('utf-8')
-        return content
-    except Exception as e:
-        print(f"Error reading S3 object: {e}")
-        return None
+        stream_download(url, source_file_path)
+        with open(source_file_path, 'rb') as source_file:
+            # PdfReader parses page objects on demand from the file
+            pdf_reader = PdfReader(source_file)
+            page_count = len(pdf_reader.pages)
+            for (start_page_index, end_page_index), output_file_path in zip(page_ranges, output_file_paths):
+                pdf_writer = PdfWriter()
+                for page_num in _page_range(start_page_index, end_page_index, page_count):
+                    pdf_writer.add_page(pdf_reader.pages[page_num])
+                print(output_file_path)
+                with open(output_file_path, "wb") as output_file:
+                    pdf_writer.write(output_file)
+    finally:
+        if not keep_source:
+            # Also drop a partial download: with keep_source it would let a later call resume
+            for path in (source_file_path, f'{source_file_path}.part'):
+                if os.path.exists(path):
+                    os.remove(path)
+    return list(output_file_paths)
 
 def download_document(url, start_page_index=None, end_page_index=None, output_file_path=None):
 
     if not output_file_path:
         filename = os.path.basename(url)
         output_file_path = filename
-        
-    # Download the PDF
-    response = requests.get(url)
-    print(response)
-    pdf_content = io.BytesIO(response.content)
-    
-    # Create a PDF reader object
-    pdf_reader = PdfReader(pdf_content)
-    
-    # Create a PDF writer object
-    pdf_writer = PdfWriter()
-    
-    start_page_index = 0 if not start_page_index else max(start_page_index,0)
-    end_page_index = len(pdf_reader.pages)-1 if not end_page_index else min(end_page_index,len(pdf_reader.pages)-1)
 
-    # Specify the pages you want to extract (0-indexed)
-    pages_to_extract = list(range(start_page_index, end_page_index))
-    
-    # Add the specified pages to the writer
-    for page_num in pages_to_extract:
-        page = pdf_reader.pages[page_num]
-        pdf_writer.add_page(page)
-
-    print(output_file_path)
-    # Save the extracted pages to a new PDF
-    with open(output_file_path, "wb") as output_file:
-        pdf_writer.write(output_file)
-    return output_file_path
+    # Pages from start_page_index to end_page_index, both inclusive
+    return download_document_slices(url, [(start_page_index, end_page_index)], [output_file_path])[0]
 
 
-import boto3
-from botocore.config import Config
-from urllib.parse import urlparse
-from typing import Optional
-import pandas as pd
+_presigned_url_cache = {}
+_presigned_url_lock = threading.Lock()
 
-def generate_presigned_url(s3_uri: str, expiration: int = 3600) -> Optional[str]:
+
+def generate_presigned_urls(s3_uris: Iterable[str], expiration: int = 3600,
+                            refresh_margin: int = 300) -> List[Optional[str]]:
     """
-    Generate a presigned URL for an S3 object with retry logic.
+    Generate presigned URLs for many S3 objects with one client.
+
+    URLs are cached per S3 URI and reused until ``refresh_margin`` seconds
+    before they expire, so signing the same objects again is a dictionary lookup.
     
     Args:
-        s3_uri (str): S3 URI in format 's3://bucket-name/key'
+        s3_uris (Iterable[str]): S3 URIs in format 's3://bucket-name/key'
         expiration (int): URL expiration time in seconds
+        refresh_margin (int): Re-sign cached URLs that expire within this many seconds
         
     Returns:
-        Optional[str]: Presigned URL or None if generation fails
+        List[Optional[str]]: Presigned URLs in input order, None where generation failed
     """
-    try:
-        parsed = urlparse(s3_uri)
-        bucket = parsed.netloc
-        key = parsed.path.lstrip('/')
-        
-        config = Config(
-            signature_version='s3v4',
-            retries={'max_attempts': 3}
-        )
-        s3_client = boto3.client('s3', config=config)
-        
-        return s3_client.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': bucket, 'Key': key},
-            ExpiresIn=expiration
-        )
-    except Exception as e:
-        print(f"Error generating presigned URL for {s3_uri}: {e}")
-        return None
-
-def create_image_html_column(row: pd.Series, image_col: str, width: str = '300px') -> str:
+    s3_client = get_client('s3', signature_version='s3v4', retries={'max_attempts': 3})
+    now = time.time()
+    urls = []
+    with _presigned_url_lock:
+        for s3_uri in s3_uris:
+            cached = _presigned_url_cache.get(s3_uri)
+            if cached and cached[1] - refresh_margin > now:
+                urls.append(cached[0])
+                continue
+            try:
+                bucket, key = get_bucket_and_key(s3_uri)
+                url = s3_client.generate_presigned_url(
+                    'get_object',
+                    Params={'Bucket': bucket, 'Key': key},
+                    ExpiresIn=expiration
+                )
+            except Exception as e:
+                print(f"Error generating presigned URL for {s3_uri}: {e}")
+                url = None
+            if url:
+                _presigned_url_cache[s3_uri] = (url, now + expiration)
+            urls.append(url)
+    return urls
+
+def generate_presigned_url(s3_uri: str, expiration: int = 3600) -> Optional[str]:
     """
-    Create HTML embedded image from S3 URI using presigned URL for a DataFrame row.
+    Generate a presigned URL for an S3 object with retry logic.
     
     Args:
-        row (pd.Series): DataFrame row
-        image_col (str): Name of column containing S3 URI
-        width (str): Fixed width for image
+        s3_uri (str): S3 URI in format 's3://bucket-name/key'
+        expiration (int): URL expiration time in seconds
         
     Returns:
-        str: HTML string for embedded image
+        Optional[str]: Presigned URL or None if generation fails
     """
-    s3_uri = row[image_col]
-    if type(s3_uri)==list:
-        s3_uri=s3_uri[0]    
-    if pd.isna(s3_uri):
-        return ''
-    
-    presigned_url = generate_presigned_url(s3_uri)
-    if presigned_url:
-        return f'<img src="{presigned_url}" style="width: {width}; object-fit: contain;">'
-    return ''
-
-
-# Example usage:
-"""
-# Add embedded images column
-df['embedded_images'] = add_embedded_images(df, 'crop_images', width='300px')
-
-# For Jupyter notebook display:
-from IPython.display import HTML
-HTML(df['embedded_images'].iloc[0])
-"""
-
-
+    return generate_presigned_urls([s3_uri], expiration)[0]
 
 def wait_for_completion(
     client,
@@ -179,28 +252,44 @@ def wait_for_completion(
     status_path_in_response,
     completion_states,
     error_states,
-    max_iterations=60,
-    delay=10
+    max_iterations=None,
+    delay=None,
+    polling_policy=None,
+    timeline=None
 ):
-    for _ in range(max_iterations):
-        try:
-            response = get_status_function(**status_kwargs)
-            status = get_nested_value(response, status_path_in_response)
-
-            if status in completion_states:
-                print(f"Operation completed successfully with status: {status}")
-                return response
-
-            if status in error_states:
-                raise Exception(f"Operation failed with status: {status}")
-
-            print(f"Current status: {status}. Waiting...")
-            time.sleep(delay)
+    """
+    Poll ``get_status_function`` until the status reaches a completion or error state.
 
+    ``max_iterations`` and ``delay`` are kept for compatibility: they cap the
+    backoff at ``delay`` seconds and set the deadline to ``max_iterations * delay``.
+    Pass a ``PollingPolicy`` for full control, and a ``StatusTimeline`` to record
+    how long the operation spent in each status.
+    """
+    if polling_policy is None:
+        polling_policy = PollingPolicy.from_iterations(max_iterations, delay)
+    with span('bda.wait_for_completion', operation=getattr(get_status_function, '__name__', None)) as wait_span:
+        # Namespaced so a status argument can never clash with span() or its own attributes
+        for key, value in status_kwargs.items():
+            if isinstance(value, str):
+                wait_span.set(f'arg.{key}', value)
+        try:
+            response = polling_policy.poll(
+                get_status=lambda: get_status_function(**status_kwargs),
+                status_of=lambda response: get_nested_value(response, status_path_in_response),
+                terminal_states=list(completion_states) + list(error_states),
+                timeline=timeline,
+                on_wait=lambda status, wait: print(f"Current status: {status}. Waiting..."))
         except ClientError as e:
             raise Exception(f"Error checking status: {str(e)}")
+        except TimeoutError:
+            raise Exception(f"Operation timed out after {polling_policy.deadline} seconds")
 
-    raise Exception(f"Operation timed out after {max_iterations} iterations")
+        status = get_nested_value(response, status_path_in_response)
+        wait_span.set('status', status)
+    if status in error_states:
+        raise Exception(f"Operation failed with status: {status}")
+    print(f"Operation completed successfully with status: {status}")
+    return response
 
 
 def get_nested_value(data, path):
@@ -220,47 +309,16 @@ def get_nested_value(data, path):
     return data
 
 
-def display_html(data, root='root', expanded=True, bg_color='#f0f0f0'):
-    html = f"""
-        <div class="custom-json-output" style="background-color: {bg_color}; padding: 10px; border-radius: 5px;">
-            <button class="toggle-btn" style="margin-bottom: 10px;">{'Collapse' if expanded else 'Expand'}</button>
-            <pre class="json-content" style="display: {'block' if expanded else 'none'};">{data}</pre>
-        </div>
-        <script>
-        (function() {{
-            var toggleBtn = document.currentScript.previousElementSibling.querySelector('.toggle-btn');
-            var jsonContent = document.currentScript.previousElementSibling.querySelector('.json-content');
-            toggleBtn.addEventListener('click', function() {{
-                if (jsonContent.style.display === 'none') {{
-                    jsonContent.style.display = 'block';
-                    toggleBtn.textContent = 'Collapse';
-                }} else {{
-                    jsonContent.style.display = 'none';
-                    toggleBtn.textContent = 'Expand';
-                }}
-            }});
-        }})();
-        </script>
-        """
-    display(HTML(html))
-
-def send_request(region, url, method, credentials, payload=None, service='bedrock'):
-    host = url.split("/")[2]
-    request = AWSRequest(
-            method,
-            url,
-            data=payload,
-            headers={'Host': host, 'Content-Type':'application/json'}
-    )    
-    SigV4Auth(credentials, service, region).add_auth(request)
-    response = requests.request(method, url, headers=dict(request.headers), data=payload, timeout=50)
-    response.raise_for_status()
-    content = response.content.decode("utf-8")
-    data = json.loads(content)
-    return data
+def send_request(region, url, method, credentials=None, payload=None, service='bedrock', idempotent=None):
+    # Shared keep-alive session with retries; credentials default to the
+    # transport's cached, auto-refreshing session credentials. POSTs are only
+    # retried when they cannot have reached the server unless idempotent=True
+    transport = get_signed_transport(region, service)
+    with span('bda.send_request', method=method, path=urlparse(url).path,
+              request_bytes=len(payload) if payload else 0):
+        return transport.request(method, url, payload=payload, credentials=credentials, idempotent=idempotent)
 
-def invoke_blueprint_recommendation_async(bda_client,region_name, payload):
-    credentials = boto3.Session().get_credentials().get_frozen_credentials()
+def invoke_blueprint_recommendation_async(bda_client, region_name, payload, credentials=None):
     url = f"{bda_client.meta.endpoint_url}/invokeBlueprintRecommendationAsync"
     print(f'Sending request to {url}')
     result = send_request(
@@ -273,44 +331,26 @@ def invoke_blueprint_recommendation_async(bda_client,region_name, payload):
     return result
 
 
-def get_blueprint_recommendation(bda_client, region_name, credentials, job_id):
+def get_blueprint_recommendation(bda_client, region_name, credentials=None, job_id=None):
     url = f"{bda_client.meta.endpoint_url}/getBlueprintRecommendation/{job_id}/"
     result = send_request(
         region = region_name,
         url = url,
         method = "POST",
-        credentials = credentials        
+        credentials = credentials,
+        # A status read despite the POST, so it is safe to retry
+        idempotent = True
     )
     return result
 
 def create_or_update_blueprint(bda_client, blueprint_name, blueprint_description, blueprint_type, blueprint_stage, blueprint_schema):
-    list_blueprints_response = bda_client.list_blueprints(
-        blueprintStageFilter='ALL'
-    )
-    blueprint = next((blueprint for blueprint in
-                      list_blueprints_response['blueprints']
-                      if 'blueprintName' in blueprint and
-                      blueprint['blueprintName'] == blueprint_name), None)
-
-    if not blueprint:
-        print(f'No existing blueprint found with name={blueprint_name}, creating custom blueprint')
-        response = bda_client.create_blueprint(
-            blueprintName=blueprint_name,
-            type=blueprint_type,
-            blueprintStage=blueprint_stage,
-            schema=json.dumps(blueprint_schema)
-        )
-    else:
-        print(f'Found existing blueprint with name={blueprint_name}, updating Stage and Schema')
-        response = bda_client.update_blueprint(
-            blueprintArn=blueprint['blueprintArn'],
-            blueprintStage=blueprint_stage,
-            schema=json.dumps(blueprint_schema)
-        )
-
-    return response['blueprint']['blueprintArn']
+    # The registry pages through all blueprints once, caches the listing and
+    # skips update_blueprint when the canonical schema hash is unchanged
+    registry = get_blueprint_registry(bda_client)
+    return registry.create_or_update(blueprint_name, blueprint_type, blueprint_stage, blueprint_schema)['blueprintArn']
 
 
+@traced('transform.custom_output')
 def transform_custom_output(input_json, explainability_info):
     result = {
         "forms": {},
@@ -351,6 +391,8 @@ def transform_custom_output(input_json, explainability_info):
             # Handle simple key-value pairs (forms)
             result["forms"][key] = add_confidence(value, confidence_data)
             
+    current_span().set('fields', len(result['forms']))
+    current_span().set('tables', len(result['tables']))
     return result
 
 def get_summaries(custom_outputs):
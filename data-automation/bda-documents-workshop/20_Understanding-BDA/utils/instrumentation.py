@@ -0,0 +1,257 @@
+import bisect
+import contextvars
+import functools
+import itertools
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+# Upper bounds (seconds) of the histogram buckets: 0.1ms .. ~30min, roughly 1.5x apart
+BUCKET_BOUNDS = tuple(0.0001 * 1.5 ** i for i in range(42))
+
+_enabled = False
+_sinks: List[Callable[[Dict], None]] = []
+_histograms = {}
+_histograms_lock = threading.Lock()
+_span_ids = itertools.count(1)
+_current_span = contextvars.ContextVar('bda_current_span', default=None)
+
+
+class LatencyHistogram:
+    """Fixed log-spaced buckets; recording is a bisect and two increments."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        index = bisect.bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (0..1)."""
+        if not self.count:
+            return float('nan')
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(BUCKET_BOUNDS[index], self.max) if index < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'total_s': self.total,
+            'mean_s': self.total / self.count if self.count else float('nan'),
+            'p50_s': self.quantile(0.5),
+            'p90_s': self.quantile(0.9),
+            'p99_s': self.quantile(0.99),
+            'max_s': self.max
+        }
+
+
+class Span:
+    """A timed operation with attributes; finished spans are sent to every sink."""
+
+    __slots__ = ('name', 'attributes', 'span_id', 'parent_id', 'start_time', '_started', 'duration', '_token')
+
+    def __init__(self, name: str, attributes: Dict):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_span_ids)
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self._token = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes['error'] = f'{exc_type.__name__}: {exc}'
+        self.finish()
+        return False
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+        _emit(self.name, self.duration, self.to_dict())
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': self.start_time,
+            'duration_s': self.duration,
+            'thread': threading.current_thread().name,
+            'attributes': self.attributes
+        }
+
+
+class _NoopSpan:
+    """Returned while instrumentation is disabled: entering, exiting and set() do nothing."""
+
+    __slots__ = ()
+
+    def set(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _emit(name: str, duration: float, record: Dict):
+    histogram = _histograms.get(name)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(name, LatencyHistogram())
+    histogram.record(duration)
+    for sink in _sinks:
+        try:
+            sink(record)
+        except Exception as e:
+            print(f"Instrumentation sink {sink!r} failed: {e}")
+
+
+def span(name: str, **attributes):
+    """
+    Time a block of code: ``with span('s3.read', s3_uri=uri) as s: ...; s.set('bytes', n)``.
+
+    While instrumentation is disabled this returns a shared no-op object, so
+    instrumented code costs one function call and a flag check.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def record_span(name: str, duration: float, **attributes):
+    """Record an operation timed elsewhere, e.g. a job from submission to completion."""
+    if not _enabled:
+        return
+    parent = _current_span.get()
+    _emit(name, duration, {
+        'name': name,
+        'span_id': next(_span_ids),
+        'parent_id': parent.span_id if parent else None,
+        'start_time': time.time() - duration,
+        'duration_s': duration,
+        'thread': threading.current_thread().name,
+        'attributes': attributes
+    })
+
+
+def traced(name: Optional[str] = None):
+    """Decorator that runs the function inside a span named ``name`` (defaults to the function name)."""
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with Span(span_name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """The innermost active span (a no-op span when there is none)."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+class InMemorySink:
+    """Keeps finished spans in a list, e.g. to load into a DataFrame."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record: Dict):
+        with self._lock:
+            self.spans.append(record)
+
+
+class JsonLinesSink:
+    """Appends one JSON object per finished span to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a')
+
+    def __call__(self, record: Dict):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def enable_instrumentation(*sinks: Callable[[Dict], None]):
+    """
+    Start recording spans and histograms.
+
+    Args:
+        *sinks: Callables receiving each finished span as a dict, e.g.
+            InMemorySink(), JsonLinesSink('spans.jsonl') or an adapter to
+            OpenTelemetry / CloudWatch
+    """
+    global _enabled
+    _sinks[:] = sinks
+    _enabled = True
+
+
+def disable_instrumentation():
+    global _enabled
+    _enabled = False
+    _sinks.clear()
+
+
+def latency_histograms() -> Dict[str, Dict[str, float]]:
+    """count, total, mean, p50, p90, p99 and max seconds per span name."""
+    with _histograms_lock:
+        histograms = dict(_histograms)
+    return {name: histogram.summary() for name, histogram in sorted(histograms.items())}
+
+
+def reset_histograms():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def print_latency_summary():
+    """Print the latency histograms, slowest total time first."""
+    summaries = sorted(latency_histograms().items(), key=lambda item: item[1]['total_s'], reverse=True)
+    print(f"{'span':<32}{'count':>8}{'total s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, summary in summaries:
+        print(f"{name:<32}{summary['count']:>8}{summary['total_s']:>10.2f}{summary['p50_s'] * 1000:>10.1f}"
+              f"{summary['p99_s'] * 1000:>10.1f}{summary['max_s'] * 1000:>10.1f}")
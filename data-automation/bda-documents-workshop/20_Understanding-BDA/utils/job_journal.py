@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'bda-workshop', 'jobs.sqlite')
+TERMINAL_STATES = ('Success', 'ServiceError', 'ClientError')
+
+
+class JobJournal:
+    """
+    Durable record of every document submitted to BDA in a batch.
+
+    Each document is journaled before it is submitted (with the client token
+    sent to BDA), again once BDA returns its invocationArn, and whenever the
+    poller sees a new status. A batch restarted with the same journal
+    therefore polls jobs that were in flight instead of submitting them again,
+    and returns completed jobs without touching BDA. If the process died
+    between submitting a document and recording its invocationArn, the
+    resubmission reuses the journaled client token, which BDA treats as the
+    same request. Entries are keyed by input URI and configuration (including
+    the input's version, e.g. its ETag, when the batch is given one), so the
+    same journal can hold several runs; without a version, reuse assumes the
+    object under a URI is never replaced.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            # WAL keeps a commit per status change cheap while staying crash-safe
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' key TEXT PRIMARY KEY, input_s3_uri TEXT, config TEXT, client_token TEXT,'
+                ' invocation_arn TEXT, status TEXT, job_metadata_s3_uri TEXT, error TEXT,'
+                ' created_at REAL, updated_at REAL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)')
+
+    @staticmethod
+    def key(input_s3_uri: str, config: Optional[Dict] = None) -> str:
+        canonical = json.dumps(config or {}, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(f'{input_s3_uri}\n{canonical}'.encode('utf-8')).hexdigest()
+
+    def get(self, input_s3_uri: str, config: Optional[Dict] = None) -> Optional[Dict]:
+        with self._lock:
+            cursor = self._connection.execute(
+                'SELECT input_s3_uri, client_token, invocation_arn, status, job_metadata_s3_uri, error, updated_at'
+                ' FROM jobs WHERE key = ?', (self.key(input_s3_uri, config),))
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip(('input_s3_uri', 'client_token', 'invocation_arn', 'status',
+                         'job_metadata_s3_uri', 'error', 'updated_at'), row))
+
+    def start(self, input_s3_uri: str, config: Optional[Dict] = None) -> str:
+        """
+        Record that a document is about to be submitted.
+
+        Returns:
+            str: The client token to submit with; the same token as an earlier
+            attempt that never recorded an invocationArn
+        """
+        key = self.key(input_s3_uri, config)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT client_token, invocation_arn FROM jobs WHERE key = ?', (key,)).fetchone()
+            if row and row[0] and not row[1]:
+                return row[0]
+            client_token = str(uuid.uuid4())
+            self._connection.execute(
+                'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, NULL, ?, NULL, NULL, ?, ?)',
+                (key, input_s3_uri, json.dumps(config or {}, sort_keys=True), client_token,
+                 'Submitting', now, now))
+        return client_token
+
+    def record_submission(self, input_s3_uri: str, config: Optional[Dict], invocation_arn: str):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE jobs SET invocation_arn = ?, status = ?, error = NULL, updated_at = ? WHERE key = ?',
+                (invocation_arn, 'Submitted', time.time(), self.key(input_s3_uri, config)))
+
+    def update_status(self, input_s3_uri: str, config: Optional[Dict], status: Optional[str],
+                      job_metadata_s3_uri: Optional[str] = None, error: Optional[str] = None,
+                      invocation_arn: Optional[str] = None):
+        """Record a new status (and, once finished, the job_metadata URI or error)."""
+        key = self.key(input_s3_uri, config)
+        now = time.time()
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'UPDATE jobs SET status = ?, job_metadata_s3_uri = ?, error = ?,'
+                ' invocation_arn = COALESCE(?, invocation_arn), updated_at = ? WHERE key = ?',
+                (status, job_metadata_s3_uri, error, invocation_arn, now, key))
+            if cursor.rowcount == 0:
+                self._connection.execute(
+                    'INSERT INTO jobs VALUES (?, ?, ?, NULL, ?, ?, ?, ?, ?, ?)',
+                    (key, input_s3_uri, json.dumps(config or {}, sort_keys=True), invocation_arn,
+                     status, job_metadata_s3_uri, error, now, now))
+
+    def in_flight(self) -> List[Dict]:
+        """Jobs submitted but not finished, e.g. to inspect what a restart will reattach to."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT input_s3_uri, invocation_arn, status, updated_at FROM jobs'
+                ' WHERE status NOT IN (?, ?, ?) ORDER BY updated_at', TERMINAL_STATES).fetchall()
+        return [dict(zip(('input_s3_uri', 'invocation_arn', 'status', 'updated_at'), row)) for row in rows]
+
+    def summary(self) -> Dict[str, int]:
+        """Number of journaled jobs per status."""
+        with self._lock:
+            rows = self._connection.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        self._connection.close()
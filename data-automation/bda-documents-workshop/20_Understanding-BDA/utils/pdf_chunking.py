@@ -0,0 +1,235 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from .aws_clients import get_client
+from .batch_processing import process_documents_in_batch
+from .helper_functions import get_bucket_and_key, read_s3_json
+from .polling import PollingPolicy
+from .segment_outputs import fetch_segment_outputs
+
+
+def plan_chunks(page_count: int, pages_per_chunk: int) -> List[Tuple[int, int]]:
+    """Split ``page_count`` pages into inclusive (start_page_index, end_page_index) ranges."""
+    return [(start, min(start + pages_per_chunk, page_count) - 1)
+            for start in range(0, page_count, pages_per_chunk)]
+
+
+def _write_chunk(source_file_path, start_page_index, end_page_index, output_file_path):
+    # Runs in a worker process, so each chunk opens its own reader
+    with open(source_file_path, 'rb') as source_file:
+        pdf_reader = PdfReader(source_file)
+        pdf_writer = PdfWriter()
+        for page_num in range(start_page_index, end_page_index + 1):
+            pdf_writer.add_page(pdf_reader.pages[page_num])
+        with open(output_file_path, 'wb') as output_file:
+            pdf_writer.write(output_file)
+    return output_file_path
+
+
+def split_pdf(source_file_path: str, pages_per_chunk: int, output_dir: Optional[str] = None,
+              max_workers: Optional[int] = None) -> List[Dict]:
+    """
+    Split a PDF into page-range chunks using a process pool.
+
+    Args:
+        source_file_path (str): Local PDF to split
+        pages_per_chunk (int): Maximum number of pages per chunk
+        output_dir (Optional[str]): Directory for the chunk files, defaults to a new temporary directory
+        max_workers (Optional[int]): Number of worker processes
+
+    Returns:
+        List[Dict]: chunk_index, start_page_index, end_page_index and path of every chunk
+    """
+    with open(source_file_path, 'rb') as source_file:
+        page_count = len(PdfReader(source_file).pages)
+    output_dir = output_dir or tempfile.mkdtemp(prefix='bda-chunks-')
+    stem = Path(source_file_path).stem
+    chunks = [{
+        'chunk_index': chunk_index,
+        'start_page_index': start,
+        'end_page_index': end,
+        'path': os.path.join(output_dir, f'{stem}_chunk_{chunk_index:04d}_p{start}-{end}.pdf')
+    } for chunk_index, (start, end) in enumerate(plan_chunks(page_count, pages_per_chunk))]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(_write_chunk,
+                          [source_file_path] * len(chunks),
+                          [chunk['start_page_index'] for chunk in chunks],
+                          [chunk['end_page_index'] for chunk in chunks],
+                          [chunk['path'] for chunk in chunks]))
+    return chunks
+
+
+def _remap_page(page_index, offset):
+    return page_index + offset if isinstance(page_index, int) else page_index
+
+
+def _remap_geometry(value, offset):
+    # explainability_info nests geometry lists of {'page': ..., 'boundingBox': ...}
+    if isinstance(value, dict):
+        remapped = {key: _remap_geometry(item, offset) for key, item in value.items()}
+        if isinstance(value.get('page'), int) and 'boundingBox' in value:
+            remapped['page'] = value['page'] + offset
+        return remapped
+    if isinstance(value, list):
+        return [_remap_geometry(item, offset) for item in value]
+    return value
+
+
+def _remap_page_fields(value, offset):
+    # page_index / page_indices appear at the top of pages, elements and text_lines
+    # and again nested inside them, e.g. locations[].page_index
+    if isinstance(value, dict):
+        remapped = {}
+        for key, item in value.items():
+            if key == 'page_index':
+                remapped[key] = _remap_page(item, offset)
+            elif key == 'page_indices' and isinstance(item, list):
+                remapped[key] = [_remap_page(p, offset) for p in item]
+            else:
+                remapped[key] = _remap_page_fields(item, offset)
+        return remapped
+    if isinstance(value, list):
+        return [_remap_page_fields(item, offset) for item in value]
+    return value
+
+
+def remap_standard_output(standard_output: Dict, offset: int) -> Dict:
+    """Return a copy of a standard_output with every page index shifted by ``offset``."""
+    remapped = dict(standard_output)
+    for key in ('pages', 'elements', 'text_lines'):
+        if key in standard_output:
+            remapped[key] = _remap_page_fields(standard_output[key], offset)
+    return remapped
+
+
+def _merge_documents(documents: List[Dict]) -> Optional[Dict]:
+    """Concatenate the whole-document representations of consecutive chunks and add up their statistics."""
+    if not documents:
+        return None
+    representation = {}
+    statistics = {}
+    for document in documents:
+        for key, value in (document.get('representation') or {}).items():
+            if isinstance(value, str):
+                representation[key] = f'{representation[key]}\n\n{value}' if key in representation else value
+        for key, value in (document.get('statistics') or {}).items():
+            if isinstance(value, (int, float)):
+                statistics[key] = statistics.get(key, 0) + value
+    merged = {'representation': representation}
+    if statistics:
+        merged['statistics'] = statistics
+    return merged
+
+
+def remap_custom_output(custom_output: Dict, offset: int) -> Dict:
+    """Return a copy of a custom_output with page indices shifted by ``offset``."""
+    remapped = dict(custom_output)
+    if 'split_document' in custom_output:
+        split_document = custom_output['split_document']
+        remapped['split_document'] = dict(split_document, page_indices=[
+            _remap_page(p, offset) for p in split_document.get('page_indices', [])])
+    if 'explainability_info' in custom_output:
+        remapped['explainability_info'] = _remap_geometry(custom_output['explainability_info'], offset)
+    return remapped
+
+
+def merge_chunk_outputs(chunk_outputs: List[Dict], page_count: Optional[int] = None) -> Dict:
+    """
+    Stitch the outputs of several chunks back into one logical result.
+
+    Args:
+        chunk_outputs (List[Dict]): Per chunk, its start_page_index and the
+            (asset_id, segment_index) -> outputs mapping from fetch_segment_outputs
+        page_count (Optional[int]): Page count of the original document
+
+    Returns:
+        Dict: 'standard_output' with pages, elements and text_lines of the whole document
+        and its document representation concatenated across chunks, and 'custom_outputs', one per matched segment in page order. Segments are not merged
+        across chunk boundaries.
+    """
+    standard_output = {'metadata': None, 'pages': [], 'elements': [], 'text_lines': []}
+    custom_outputs = []
+    documents = []
+    for chunk in sorted(chunk_outputs, key=lambda chunk: chunk['start_page_index']):
+        offset = chunk['start_page_index']
+        for segment_key in sorted(chunk['segment_outputs']):
+            outputs = chunk['segment_outputs'][segment_key]
+            if outputs.get('standard_output'):
+                remapped = remap_standard_output(outputs['standard_output'], offset)
+                if standard_output['metadata'] is None:
+                    standard_output['metadata'] = remapped.get('metadata')
+                if remapped.get('document'):
+                    documents.append(remapped['document'])
+                standard_output['pages'] += remapped['pages']
+                standard_output['elements'] += remapped['elements']
+                standard_output['text_lines'] += remapped.get('text_lines', [])
+            if outputs.get('custom_output'):
+                custom_outputs.append(remap_custom_output(outputs['custom_output'], offset))
+
+    if documents:
+        standard_output['document'] = _merge_documents(documents)
+    if standard_output['metadata'] is not None and page_count is not None:
+        standard_output['metadata'] = dict(standard_output['metadata'], start_page_index=0,
+                                           end_page_index=page_count - 1, number_of_pages=page_count)
+    return {'standard_output': standard_output, 'custom_outputs': custom_outputs}
+
+
+def process_pdf_in_chunks(source_file_path: str,
+                          input_s3_uri: str,
+                          output_s3_uri: str,
+                          project_arn: Optional[str] = None,
+                          blueprint_arns: Optional[List[str]] = None,
+                          pages_per_chunk: int = 50,
+                          max_workers: int = 8,
+                          polling_policy: Optional[PollingPolicy] = None) -> Dict:
+    """
+    Split a large PDF, process the chunks concurrently with BDA and merge the results.
+
+    Args:
+        source_file_path (str): Local PDF to process
+        input_s3_uri (str): S3 prefix the chunks are uploaded to
+        output_s3_uri (str): S3 prefix where BDA writes its outputs
+        project_arn (Optional[str]): Data automation project to run, if any
+        blueprint_arns (Optional[List[str]]): Blueprints to apply when no project is given
+        pages_per_chunk (int): Maximum number of pages per BDA invocation
+        max_workers (int): Concurrency for splitting, uploads and API calls
+        polling_policy (Optional[PollingPolicy]): Backoff and deadline for each chunk job
+
+    Returns:
+        Dict: The merged result from merge_chunk_outputs, plus the per-chunk job results under 'chunks'
+    """
+    chunks = split_pdf(source_file_path, pages_per_chunk, max_workers=max_workers)
+    bucket_name, prefix = get_bucket_and_key(input_s3_uri)
+    s3_client = get_client('s3', max_pool_connections=max_workers)
+
+    def upload(chunk):
+        object_key = f"{prefix.rstrip('/')}/{os.path.basename(chunk['path'])}"
+        s3_client.upload_file(chunk['path'], bucket_name, object_key)
+        os.remove(chunk['path'])
+        return f's3://{bucket_name}/{object_key}'
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for chunk, chunk_s3_uri in zip(chunks, executor.map(upload, chunks)):
+            chunk['s3_uri'] = chunk_s3_uri
+    chunk_by_uri = {chunk['s3_uri']: chunk for chunk in chunks}
+
+    for result in process_documents_in_batch([chunk['s3_uri'] for chunk in chunks], output_s3_uri,
+                                             project_arn=project_arn, blueprint_arns=blueprint_arns,
+                                             max_workers=max_workers, polling_policy=polling_policy):
+        chunk = chunk_by_uri[result['input_s3_uri']]
+        chunk['job'] = result
+        if result['status'] != 'Success':
+            raise Exception(f"Chunk {chunk['chunk_index']} (pages {chunk['start_page_index']}-{chunk['end_page_index']}) "
+                            f"failed: status={result['status']}, error={result['error']}")
+        job_metadata = read_s3_json(result['job_metadata_s3_uri'], s3_client=s3_client)
+        chunk['segment_outputs'] = fetch_segment_outputs(job_metadata, s3_client=s3_client, max_workers=max_workers)
+
+    merged = merge_chunk_outputs(chunks, page_count=chunks[-1]['end_page_index'] + 1 if chunks else 0)
+    merged['chunks'] = [{key: value for key, value in chunk.items() if key != 'segment_outputs'} for chunk in chunks]
+    return merged
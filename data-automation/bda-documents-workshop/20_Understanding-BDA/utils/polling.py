@@ -0,0 +1,119 @@
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class PollingPolicy:
+    """
+    Exponential backoff with jitter for status polling.
+
+    The first check happens after ``first_delay`` seconds so that short jobs
+    are picked up quickly; subsequent delays grow by ``multiplier`` up to
+    ``max_delay``. Polling stops once ``deadline`` seconds have elapsed.
+    ``clock``, ``sleep`` and ``rand`` can be replaced to run offline.
+    """
+
+    def __init__(self,
+                 first_delay: float = 1,
+                 initial_delay: float = 2,
+                 max_delay: float = 30,
+                 multiplier: float = 2,
+                 jitter: float = 0.2,
+                 deadline: Optional[float] = 3600,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rand: Callable[[], float] = random.random):
+        self.first_delay = first_delay
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self.clock = clock
+        self.sleep = sleep
+        self.rand = rand
+
+    @classmethod
+    def from_iterations(cls, max_iterations: Optional[int] = None, delay: Optional[float] = None, **kwargs):
+        """Build a policy from the legacy ``max_iterations`` / ``delay`` arguments."""
+        if delay is not None:
+            kwargs.setdefault('max_delay', delay)
+            kwargs.setdefault('initial_delay', min(delay, 2))
+            kwargs.setdefault('first_delay', min(delay, 1))
+        if max_iterations is not None:
+            kwargs.setdefault('deadline', max_iterations * kwargs.get('max_delay', 30))
+        return cls(**kwargs)
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before check number ``attempt`` (0-based)."""
+        if attempt == 0:
+            base = self.first_delay
+        else:
+            base = min(self.max_delay, self.initial_delay * self.multiplier ** (attempt - 1))
+        if self.jitter:
+            base *= 1 + self.jitter * (2 * self.rand() - 1)
+        return max(0.0, base)
+
+    def expired(self, started_at: float) -> bool:
+        return self.deadline is not None and self.clock() - started_at >= self.deadline
+
+    def poll(self, get_status: Callable[[], Dict], status_of: Callable[[Dict], str],
+             terminal_states, timeline: Optional['StatusTimeline'] = None, on_wait=None) -> Dict:
+        """
+        Call ``get_status`` until ``status_of`` its response is in ``terminal_states``.
+
+        Raises:
+            TimeoutError: If the deadline passes before a terminal state is reached
+        """
+        started_at = self.clock()
+        if timeline is not None:
+            timeline.start(self.clock)
+        attempt = 0
+        while True:
+            response = get_status()
+            status = status_of(response)
+            if timeline is not None:
+                timeline.record(status)
+            if status in terminal_states:
+                return response
+            wait = self.delay(attempt)
+            if self.deadline is not None:
+                remaining = self.deadline - (self.clock() - started_at)
+                if remaining <= 0:
+                    raise TimeoutError(f"Status did not reach {list(terminal_states)} within {self.deadline}s, last status: {status}")
+                wait = min(wait, remaining)
+            if on_wait:
+                on_wait(status, wait)
+            self.sleep(wait)
+            attempt += 1
+
+
+class StatusTimeline:
+    """Records when each status was first observed while polling."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.started_at = None
+        self.transitions: List[Dict] = []
+
+    def start(self, clock: Optional[Callable[[], float]] = None):
+        if clock is not None:
+            self.clock = clock
+        self.started_at = self.clock()
+        self.transitions = []
+
+    def record(self, status: str):
+        if self.started_at is None:
+            self.start()
+        if self.transitions and self.transitions[-1]['status'] == status:
+            return
+        self.transitions.append({'status': status, 'elapsed': self.clock() - self.started_at})
+
+    def durations(self) -> Dict[str, float]:
+        """Seconds spent in each observed status; the last one runs until now."""
+        result = {}
+        now = self.clock() - self.started_at if self.started_at is not None else 0
+        for current, following in zip(self.transitions, self.transitions[1:] + [None]):
+            end = following['elapsed'] if following else now
+            result[current['status']] = result.get(current['status'], 0) + end - current['elapsed']
+        return result
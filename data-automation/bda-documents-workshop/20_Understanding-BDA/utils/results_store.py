@@ -0,0 +1,210 @@
+import json
+import uuid
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from .custom_output_transforms import transform_custom_outputs
+from .segment_outputs import list_segment_output_paths
+
+
+TABLES = ('segments', 'pages', 'elements', 'text_lines', 'fields')
+UNMATCHED_BLUEPRINT = '__unmatched__'
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.fs
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("The results store requires pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _schemas(pa):
+    # Fixed schemas keep appended files compatible even when a batch has only nulls in a column
+    common = [('job_id', pa.string()), ('asset_id', pa.int64()), ('segment_index', pa.int64()),
+              ('blueprint', pa.string()), ('date', pa.string())]
+    return {
+        'segments': pa.schema(common + [
+            ('page_indices', pa.list_(pa.int64())), ('blueprint_confidence', pa.float64()),
+            ('document_class_type', pa.string()), ('standard_output_path', pa.string()),
+            ('custom_output_path', pa.string())]),
+        'pages': pa.schema(common + [
+            ('page_index', pa.int64()), ('page_id', pa.string()), ('text', pa.string()),
+            ('markdown', pa.string()), ('rectified_image', pa.string()), ('record', pa.string())]),
+        'elements': pa.schema(common + [
+            ('element_id', pa.string()), ('type', pa.string()), ('sub_type', pa.string()),
+            ('page_indices', pa.list_(pa.int64())), ('reading_order', pa.int64()), ('text', pa.string()),
+            ('markdown', pa.string()), ('record', pa.string())]),
+        'text_lines': pa.schema(common + [
+            ('line_id', pa.string()), ('page_indices', pa.list_(pa.int64())), ('text', pa.string()),
+            ('record', pa.string())]),
+        'fields': pa.schema(common + [
+            ('field', pa.string()), ('row', pa.int64()), ('value', pa.string()), ('confidence', pa.float64())]),
+    }
+
+
+def _text(record, key):
+    representation = record.get('representation') or {}
+    value = representation.get(key)
+    return value if isinstance(value, str) else None
+
+
+def _page_list(record):
+    if 'page_indices' in record:
+        return [int(p) for p in record.get('page_indices') or []]
+    if 'page_index' in record:
+        return [int(record['page_index'])]
+    return []
+
+
+class ResultsStore:
+    """
+    Parquet dataset of BDA outputs, one table per record type.
+
+    Each table is stored under ``<root>/<table>/`` and partitioned by the
+    matched blueprint name and the processing date (hive style, e.g.
+    ``blueprint=claim-form/date=2025-01-31``). Every append writes new files,
+    so jobs can be added incrementally, and ``read`` pushes column selection
+    and filters down to the Parquet files. ``root`` may be a local path or any
+    URI pyarrow understands, such as ``s3://bucket/prefix``.
+    """
+
+    def __init__(self, root: str):
+        pyarrow = _import_pyarrow()
+        self.filesystem, self.root = pyarrow.fs.FileSystem.from_uri(root) if '://' in root \
+            else (pyarrow.fs.LocalFileSystem(), root)
+
+    def append_job(self, job_metadata: Dict, segment_outputs: Dict[Tuple[int, int], Dict],
+                   processed_date: Optional[date] = None) -> Dict[str, int]:
+        """
+        Add one job's outputs to the store.
+
+        Args:
+            job_metadata (Dict): Parsed job_metadata.json
+            segment_outputs (Dict[Tuple[int, int], Dict]): Outputs keyed by (asset_id, segment_index),
+                as returned by fetch_segment_outputs
+            processed_date (Optional[date]): Date partition, defaults to today (UTC)
+
+        Returns:
+            Dict[str, int]: Number of rows written per table
+        """
+        processed_date = (processed_date or datetime.now(timezone.utc).date()).isoformat()
+        job_id = job_metadata.get('job_id')
+        paths = list_segment_output_paths(job_metadata)
+        rows = {table: [] for table in TABLES}
+
+        segment_keys = sorted(segment_outputs)
+        custom_outputs = [segment_outputs[key].get('custom_output') for key in segment_keys]
+        transformed = transform_custom_outputs(custom_outputs, segment_ids=segment_keys)
+
+        blueprint_by_segment = {}
+        for key, custom_output in zip(segment_keys, custom_outputs):
+            asset_id, segment_index = key
+            matched_blueprint = (custom_output or {}).get('matched_blueprint', {})
+            blueprint = matched_blueprint.get('name') or UNMATCHED_BLUEPRINT
+            blueprint_by_segment[key] = blueprint
+            common = {'job_id': job_id, 'asset_id': asset_id, 'segment_index': segment_index,
+                      'blueprint': blueprint, 'date': processed_date}
+
+            rows['segments'].append(dict(
+                common,
+                page_indices=[int(p) for p in (custom_output or {}).get('split_document', {}).get('page_indices') or []],
+                blueprint_confidence=matched_blueprint.get('confidence'),
+                document_class_type=(custom_output or {}).get('document_class', {}).get('type'),
+                standard_output_path=paths.get(key, {}).get('standard_output'),
+                custom_output_path=paths.get(key, {}).get('custom_output')))
+
+            standard_output = segment_outputs[key].get('standard_output') or {}
+            for page in standard_output.get('pages', []):
+                rows['pages'].append(dict(
+                    common,
+                    page_index=page.get('page_index'),
+                    page_id=page.get('id'),
+                    text=_text(page, 'text'),
+                    markdown=_text(page, 'markdown'),
+                    rectified_image=(page.get('asset_metadata') or {}).get('rectified_image'),
+                    record=json.dumps(page)))
+            for element in standard_output.get('elements', []):
+                rows['elements'].append(dict(
+                    common,
+                    element_id=element.get('id'),
+                    type=element.get('type'),
+                    sub_type=element.get('sub_type'),
+                    page_indices=_page_list(element),
+                    reading_order=element.get('reading_order'),
+                    text=_text(element, 'text'),
+                    markdown=_text(element, 'markdown'),
+                    record=json.dumps(element)))
+            for line in standard_output.get('text_lines', []):
+                rows['text_lines'].append(dict(
+                    common,
+                    line_id=line.get('id'),
+                    page_indices=_page_list(line),
+                    text=line.get('text') if isinstance(line.get('text'), str) else _text(line, 'text'),
+                    record=json.dumps(line)))
+
+        for form in transformed['forms'].itertuples(index=False):
+            asset_id, segment_index = form.segment
+            rows['fields'].append({
+                'job_id': job_id, 'asset_id': asset_id, 'segment_index': segment_index,
+                'blueprint': blueprint_by_segment[form.segment], 'date': processed_date,
+                'field': form.field, 'row': None, 'value': None if form.value is None else str(form.value),
+                'confidence': form.confidence})
+        for field, table in transformed['tables'].items():
+            for cell in table.itertuples(index=False):
+                asset_id, segment_index = cell.segment
+                rows['fields'].append({
+                    'job_id': job_id, 'asset_id': asset_id, 'segment_index': segment_index,
+                    'blueprint': blueprint_by_segment[cell.segment], 'date': processed_date,
+                    'field': f'{field}.{cell.column}', 'row': cell.row,
+                    'value': None if cell.value is None else str(cell.value), 'confidence': cell.confidence})
+
+        for table, table_rows in rows.items():
+            self._write(table, table_rows)
+        return {table: len(table_rows) for table, table_rows in rows.items()}
+
+    def _write(self, table: str, table_rows: List[Dict]):
+        if not table_rows:
+            return
+        pyarrow = _import_pyarrow()
+        schema = _schemas(pyarrow)[table]
+        arrow_table = pyarrow.Table.from_pylist(table_rows, schema=schema)
+        partitioning = pyarrow.dataset.partitioning(
+            pyarrow.schema([schema.field('blueprint'), schema.field('date')]), flavor='hive')
+        pyarrow.dataset.write_dataset(
+            arrow_table,
+            f'{self.root.rstrip("/")}/{table}',
+            filesystem=self.filesystem,
+            format='parquet',
+            partitioning=partitioning,
+            basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore')
+
+    def read(self, table: str, columns: Optional[List[str]] = None, filters=None):
+        """
+        Read a table as a pandas DataFrame.
+
+        Args:
+            table (str): One of 'segments', 'pages', 'elements', 'text_lines' or 'fields'
+            columns (Optional[List[str]]): Columns to load
+            filters: pyarrow expression or list of (column, op, value) tuples, e.g.
+                [('blueprint', '=', 'claim-form'), ('confidence', '<', 0.8)];
+                partition columns prune whole directories
+
+        Returns:
+            pd.DataFrame: Matching rows
+        """
+        if table not in TABLES:
+            raise ValueError(f"table must be one of {TABLES}, got {table!r}")
+        pyarrow = _import_pyarrow()
+        schema = _schemas(pyarrow)[table]
+        partition_schema = pyarrow.schema([schema.field('blueprint'), schema.field('date')])
+        dataset = pyarrow.dataset.dataset(f'{self.root.rstrip("/")}/{table}', filesystem=self.filesystem,
+                                          format='parquet', schema=schema,
+                                          partitioning=pyarrow.dataset.partitioning(partition_schema, flavor='hive'))
+        if filters is not None and not isinstance(filters, pyarrow.dataset.Expression):
+            filters = pyarrow.parquet.filters_to_expression(filters)
+        return dataset.to_table(columns=columns, filter=filters).to_pandas()
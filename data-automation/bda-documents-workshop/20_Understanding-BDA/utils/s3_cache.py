@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlparse
+
+from botocore.exceptions import ClientError
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'bda-workshop', 's3')
+
+_default_cache = None
+
+
+class S3ObjectCache:
+    """
+    Local cache of S3 objects validated by ETag.
+
+    Every lookup issues a conditional GET (If-None-Match) so a cached object is
+    only transferred again when it changed in S3. Raw bytes are kept on disk
+    with least-recently-used eviction once ``max_bytes`` is exceeded, and the
+    most recently parsed JSON documents are also kept in memory.
+
+    Parsed objects are shared between callers; copy them before mutating.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 2 * 1024 ** 3,
+                 max_parsed_objects: int = 128):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_parsed_objects = max_parsed_objects
+        self._parsed = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(os.path.join(cache_dir, name))
+                                for name in os.listdir(cache_dir) if name.endswith('.data'))
+
+    def get_bytes(self, s3_uri: str, s3_client) -> bytes:
+        """Return the object's content, downloading it only if the ETag changed."""
+        return self._fetch(s3_uri, s3_client)[1]
+
+    def get_json(self, s3_uri: str, s3_client):
+        """Return the object parsed as JSON, reusing the in-memory copy if still current."""
+        with self._lock:
+            cached = self._parsed.get(s3_uri)
+        etag, content = self._fetch(s3_uri, s3_client, parsed_etag=cached[0] if cached else None)
+        if cached and cached[0] == etag:
+            with self._lock:
+                if s3_uri in self._parsed:
+                    self._parsed.move_to_end(s3_uri)
+            return cached[1]
+        parsed = json.loads(content)
+        with self._lock:
+            self._parsed[s3_uri] = (etag, parsed)
+            self._parsed.move_to_end(s3_uri)
+            while len(self._parsed) > self.max_parsed_objects:
+                self._parsed.popitem(last=False)
+        return parsed
+
+    def clear(self):
+        with self._lock:
+            self._parsed.clear()
+            for name in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, name))
+            self._total_bytes = 0
+
+    def _fetch(self, s3_uri, s3_client, parsed_etag=None):
+        parsed_uri = urlparse(s3_uri)
+        bucket_name = parsed_uri.netloc
+        object_key = parsed_uri.path.lstrip('/')
+        data_path, meta_path = self._paths(s3_uri)
+
+        etag = self._read_etag(meta_path)
+        if etag and os.path.exists(data_path):
+            try:
+                response = s3_client.get_object(Bucket=bucket_name, Key=object_key, IfNoneMatch=etag)
+            except ClientError as e:
+                if e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') != 304:
+                    raise
+                # Not modified: serve from disk and mark as recently used
+                if etag == parsed_etag:
+                    try:
+                        os.utime(data_path)
+                    except FileNotFoundError:
+                        pass
+                    return etag, None
+                try:
+                    with open(data_path, 'rb') as f:
+                        content = f.read()
+                    os.utime(data_path)
+                    return etag, content
+                except FileNotFoundError:
+                    # Evicted concurrently, fall back to a full download
+                    response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
+        else:
+            response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
+
+        content = response['Body'].read()
+        self._store(s3_uri, response['ETag'], content, data_path, meta_path)
+        return response['ETag'], content
+
+    def _paths(self, s3_uri):
+        name = hashlib.sha256(s3_uri.encode('utf-8')).hexdigest()
+        return (os.path.join(self.cache_dir, f'{name}.data'),
+                os.path.join(self.cache_dir, f'{name}.meta'))
+
+    @staticmethod
+    def _read_etag(meta_path):
+        try:
+            with open(meta_path) as f:
+                return json.load(f)['etag']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _store(self, s3_uri, etag, content, data_path, meta_path):
+        with self._lock:
+            previous_size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+            _atomic_write(data_path, content)
+            _atomic_write(meta_path, json.dumps({'s3_uri': s3_uri, 'etag': etag}).encode('utf-8'))
+            self._total_bytes += len(content) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.data'):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        for _, size, path in sorted(entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            os.remove(path)
+            meta_path = path[:-len('.data')] + '.meta'
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            self._total_bytes -= size
+
+
+def _atomic_write(path, content):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def enable_s3_cache(cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 2 * 1024 ** 3,
+                    max_parsed_objects: int = 128) -> S3ObjectCache:
+    """Turn on the cache used by read_s3_object / read_s3_json when no cache is passed explicitly."""
+    global _default_cache
+    _default_cache = S3ObjectCache(cache_dir, max_bytes, max_parsed_objects)
+    return _default_cache
+
+
+def disable_s3_cache():
+    global _default_cache
+    _default_cache = None
+
+
+def get_default_cache() -> Optional[S3ObjectCache]:
+    return _default_cache
@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from .aws_clients import get_client
+from .helper_functions import read_s3_json
+from .instrumentation import span
+
+
+def list_segment_output_paths(job_metadata: Dict) -> Dict[Tuple[int, int], Dict[str, Optional[str]]]:
+    """
+    Collect the standard and custom output S3 URIs of every segment in a job.
+
+    Custom outputs are only included for segments whose custom_output_status
+    is MATCH (or not reported), mirroring how the notebooks read them.
+
+    Args:
+        job_metadata (Dict): Parsed job_metadata.json
+
+    Returns:
+        Dict[Tuple[int, int], Dict[str, Optional[str]]]: Paths keyed by (asset_id, segment_index)
+    """
+    paths = {}
+    for asset in job_metadata.get('output_metadata', []):
+        asset_id = asset.get('asset_id')
+        for segment_index, segment in enumerate(asset.get('segment_metadata', [])):
+            custom_output_path = segment.get('custom_output_path')
+            if segment.get('custom_output_status', 'MATCH') != 'MATCH':
+                custom_output_path = None
+            paths[(asset_id, segment_index)] = {
+                'standard_output': segment.get('standard_output_path'),
+                'custom_output': custom_output_path
+            }
+    return paths
+
+
+def fetch_segment_outputs(job_metadata: Dict,
+                          s3_client=None,
+                          max_workers: int = 16,
+                          include_standard_output: bool = True,
+                          include_custom_output: bool = True) -> Dict[Tuple[int, int], Dict[str, Optional[Dict]]]:
+    """
+    Download and parse every segment output of a job concurrently.
+
+    All reads share a single S3 client whose connection pool is sized to
+    ``max_workers``. Outputs that are missing or cannot be read are None.
+
+    Args:
+        job_metadata (Dict): Parsed job_metadata.json
+        s3_client: S3 client to share across all reads
+        max_workers (int): Maximum number of concurrent GETs
+        include_standard_output (bool): Fetch standard_output for each segment
+        include_custom_output (bool): Fetch custom_output for each segment
+
+    Returns:
+        Dict[Tuple[int, int], Dict[str, Optional[Dict]]]: {(asset_id, segment_index):
+        {'standard_output': ..., 'custom_output': ...}}
+    """
+    s3_client = s3_client or get_client('s3', max_pool_connections=max_workers)
+
+    wanted = []
+    if include_standard_output:
+        wanted.append('standard_output')
+    if include_custom_output:
+        wanted.append('custom_output')
+
+    def fetch(s3_uri):
+        return read_s3_json(s3_uri, s3_client=s3_client)
+
+    results = {}
+    with span('s3.fetch_segment_outputs', job_id=job_metadata.get('job_id')) as fetch_span, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for segment_key, paths in list_segment_output_paths(job_metadata).items():
+            results[segment_key] = {output_type: None for output_type in wanted}
+            for output_type in wanted:
+                if paths[output_type]:
+                    futures[(segment_key, output_type)] = executor.submit(fetch, paths[output_type])
+        for (segment_key, output_type), future in futures.items():
+            results[segment_key][output_type] = future.result()
+        fetch_span.set('segments', len(results))
+        fetch_span.set('objects', len(futures))
+    return results
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+# Repeating these after the server may have acted on them could, for example, start a second job
+NON_IDEMPOTENT_METHODS = ('POST', 'PATCH')
+
+
+class _SigV4Signer:
+    """Signs requests with credentials that boto3 refreshes automatically when they expire."""
+
+    def __init__(self, region: str, service: str = 'bedrock', session=None):
+        import boto3
+        from botocore.auth import SigV4Auth
+        from botocore.awsrequest import AWSRequest
+        self._sigv4_auth = SigV4Auth
+        self._aws_request = AWSRequest
+        self.region = region
+        self.service = service
+        self._credentials = (session or boto3.Session()).get_credentials()
+
+    def headers(self, method, url, payload=None, credentials=None) -> Dict[str, str]:
+        host = url.split("/")[2]
+        request = self._aws_request(
+            method,
+            url,
+            data=payload,
+            headers={'Host': host, 'Content-Type': 'application/json'}
+        )
+        # get_frozen_credentials is a cheap snapshot that triggers a refresh only near expiry
+        credentials = credentials or self._credentials.get_frozen_credentials()
+        self._sigv4_auth(credentials, self.service, self.region).add_auth(request)
+        return dict(request.headers)
+
+
+def _retry_delay(attempt, backoff, retry_after=None):
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return backoff * 2 ** attempt * (0.5 + random.random())
+
+
+class SignedTransport:
+    """
+    SigV4-signed JSON requests over a persistent, pooled HTTP session.
+
+    Connections are kept alive between calls, credentials are looked up once
+    and refreshed by boto3 when they expire, and 429 / 5xx responses and
+    connection errors and timeouts are retried with exponential backoff
+    (honouring Retry-After). Requests that are not idempotent are only retried
+    when the server cannot have acted on them: on a 429 or a failure to
+    connect, but not on a read timeout. Safe to share across threads.
+    """
+
+    def __init__(self, region: str, service: str = 'bedrock', session=None, max_retries: int = 4,
+                 backoff: float = 0.5, pool_maxsize: int = 50, timeout: float = 50):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.exceptions import ConnectTimeoutError
+        # ReadTimeout is not a ConnectionError, so both are caught; it is only retried when idempotent
+        self._connection_error = (requests.ConnectionError, requests.Timeout)
+        self._connect_timeout = requests.ConnectTimeout
+        # urllib3 raises NewConnectionError, a ConnectTimeoutError, when it cannot connect at all
+        self._urllib3_connect_error = ConnectTimeoutError
+        self.signer = _SigV4Signer(region, service, session)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+
+    def _not_sent(self, error) -> bool:
+        if isinstance(error, self._connect_timeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, self._urllib3_connect_error)
+
+    def request(self, method: str, url: str, payload=None, credentials=None,
+                idempotent: Optional[bool] = None) -> Dict:
+        """
+        Send a signed request and return its parsed JSON response.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            payload: Request body
+            credentials: Credentials to sign with instead of the session's
+            idempotent (Optional[bool]): Whether the request may safely be repeated;
+                defaults to False for POST and PATCH
+        """
+        if idempotent is None:
+            idempotent = method.upper() not in NON_IDEMPOTENT_METHODS
+        retryable_status_codes = RETRYABLE_STATUS_CODES if idempotent else (429,)
+        for attempt in range(self.max_retries + 1):
+            # Re-sign on every attempt so the signature timestamp stays fresh
+            headers = self.signer.headers(method, url, payload, credentials)
+            try:
+                response = self.http.request(method, url, headers=headers, data=payload, timeout=self.timeout)
+            except self._connection_error as e:
+                if attempt == self.max_retries or not (idempotent or self._not_sent(e)):
+                    raise
+                time.sleep(_retry_delay(attempt, self.backoff))
+                continue
+            if response.status_code in retryable_status_codes and attempt < self.max_retries:
+                time.sleep(_retry_delay(attempt, self.backoff, response.headers.get('Retry-After')))
+                continue
+            response.raise_for_status()
+            return json.loads(response.content.decode("utf-8"))
+
+    def close(self):
+        self.http.close()
+
+
+class AsyncSignedTransport:
+    """
+    asyncio variant of SignedTransport built on aiohttp.
+
+    ``max_concurrency`` bounds the number of requests in flight at once.
+    Use as ``async with AsyncSignedTransport(region) as transport: ...``.
+    """
+
+    def __init__(self, region: str, service: str = 'bedrock', session=None, max_retries: int = 4,
+                 backoff: float = 0.5, max_concurrency: int = 20, timeout: float = 50):
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("AsyncSignedTransport requires aiohttp: pip install aiohttp")
+        self._aiohttp = aiohttp
+        # ConnectionTimeoutError only exists in aiohttp 3.10+
+        self._connect_errors = (aiohttp.ClientConnectorError,) + tuple(
+            error for error in (getattr(aiohttp, 'ConnectionTimeoutError', None),) if error)
+        self.signer = _SigV4Signer(region, service, session)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.http = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        self.http = self._aiohttp.ClientSession(
+            connector=self._aiohttp.TCPConnector(limit=self.max_concurrency),
+            timeout=self._aiohttp.ClientTimeout(total=self.timeout))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.http.close()
+
+    async def request(self, method: str, url: str, payload=None, credentials=None,
+                      idempotent: Optional[bool] = None) -> Dict:
+        """Async counterpart of SignedTransport.request, with the same retry rules."""
+        if idempotent is None:
+            idempotent = method.upper() not in NON_IDEMPOTENT_METHODS
+        retryable_status_codes = RETRYABLE_STATUS_CODES if idempotent else (429,)
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                headers = self.signer.headers(method, url, payload, credentials)
+                try:
+                    async with self.http.request(method, url, headers=headers, data=payload) as response:
+                        if response.status in retryable_status_codes and attempt < self.max_retries:
+                            delay = _retry_delay(attempt, self.backoff, response.headers.get('Retry-After'))
+                        else:
+                            response.raise_for_status()
+                            return json.loads(await response.text())
+                except (self._aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    # The connection was never established, so nothing was sent; any other
+                    # error or timeout may have reached the server
+                    not_sent = isinstance(e, self._connect_errors)
+                    if attempt == self.max_retries or not (idempotent or not_sent):
+                        raise
+                    delay = _retry_delay(attempt, self.backoff)
+                await asyncio.sleep(delay)
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_signed_transport(region: str, service: str = 'bedrock') -> SignedTransport:
+    """Return the SignedTransport shared by all callers for ``region`` and ``service``."""
+    key = (region, service)
+    transport = _transports.get(key)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(key)
+            if transport is None:
+                transport = SignedTransport(region, service)
+                _transports[key] = transport
+    return transport
+
+
+async def invoke_blueprint_recommendations(bda_client, region_name: str, payloads: List[str],
+                                           max_concurrency: int = 20) -> List[Dict]:
+    """
+    Start many blueprint recommendation jobs concurrently.
+
+    Args:
+        bda_client: bedrock-data-automation client, used for its endpoint URL
+        region_name (str): AWS region
+        payloads (List[str]): JSON request bodies, one per recommendation
+        max_concurrency (int): Maximum number of requests in flight
+
+    Returns:
+        List[Dict]: Responses (each with a jobId) in payload order
+    """
+    url = f"{bda_client.meta.endpoint_url}/invokeBlueprintRecommendationAsync"
+    async with AsyncSignedTransport(region_name, max_concurrency=max_concurrency) as transport:
+        return await asyncio.gather(*(transport.request("POST", url, payload) for payload in payloads))
@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+from .aws_clients import get_client
+from .helper_functions import get_bucket_and_key
+
+
+SECTIONS = ('pages', 'elements', 'text_lines')
+
+
+def iter_standard_output(source,
+                         section: str = 'elements',
+                         element_types: Optional[Iterable[str]] = None,
+                         page_indices: Optional[Iterable[int]] = None,
+                         s3_client=None) -> Iterator[Dict]:
+    """
+    Yield records of one section of a standard_output one at a time.
+
+    The document is parsed incrementally with ijson, so only the current record
+    is held in memory regardless of document size. Records that do not match
+    ``element_types`` or ``page_indices`` are discarded as soon as they are parsed.
+
+    Args:
+        source: s3:// URI, local file path or binary file-like object
+        section (str): One of 'pages', 'elements' or 'text_lines'
+        element_types (Optional[Iterable[str]]): Keep only records whose 'type' is in this set, e.g. {'TEXT', 'TABLE'}
+        page_indices (Optional[Iterable[int]]): Keep only records on these page indices
+        s3_client: S3 client used when ``source`` is an s3:// URI
+
+    Yields:
+        Dict: One record of the requested section
+    """
+    if section not in SECTIONS:
+        raise ValueError(f"section must be one of {SECTIONS}, got {section!r}")
+    try:
+        import ijson
+    except ImportError:
+        raise ImportError("Streaming standard outputs requires ijson: pip install ijson")
+
+    element_types = set(element_types) if element_types is not None else None
+    page_indices = set(page_indices) if page_indices is not None else None
+
+    with _open_source(source, s3_client) as stream:
+        for record in ijson.items(stream, f'{section}.item', use_float=True):
+            if element_types is not None and record.get('type') not in element_types:
+                continue
+            if page_indices is not None and page_indices.isdisjoint(_record_pages(record)):
+                continue
+            yield record
+
+
+def iter_pages(source, page_indices=None, s3_client=None) -> Iterator[Dict]:
+    return iter_standard_output(source, 'pages', page_indices=page_indices, s3_client=s3_client)
+
+
+def iter_elements(source, element_types=None, page_indices=None, s3_client=None) -> Iterator[Dict]:
+    return iter_standard_output(source, 'elements', element_types, page_indices, s3_client)
+
+
+def iter_text_lines(source, page_indices=None, s3_client=None) -> Iterator[Dict]:
+    return iter_standard_output(source, 'text_lines', page_indices=page_indices, s3_client=s3_client)
+
+
+def _record_pages(record):
+    if 'page_indices' in record:
+        return record['page_indices'] or ()
+    if 'page_index' in record:
+        return (record['page_index'],)
+    return ()
+
+
+@contextmanager
+def _open_source(source, s3_client):
+    if hasattr(source, 'read'):
+        yield source
+    elif str(source).startswith('s3://'):
+        bucket_name, object_key = get_bucket_and_key(source)
+        s3_client = s3_client or get_client('s3')
+        body = s3_client.get_object(Bucket=bucket_name, Key=object_key)['Body']
+        try:
+            yield body
+        finally:
+            body.close()
+    else:
+        with open(source, 'rb') as f:
+            yield f
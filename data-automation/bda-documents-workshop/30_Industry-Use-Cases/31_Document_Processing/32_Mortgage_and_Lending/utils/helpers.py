@@ -1,76 +1,191 @@
-from PIL import Image
+import html
 import json
-from IPython.display import display, HTML
-import ipywidgets as widgets
 import io
+import itertools
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 
-def pil_to_bytes(image):
+def pil_to_bytes(image, max_size=None, image_format='PNG'):
+    # max_size downscales to a thumbnail that fits in a max_size x max_size box
+    if max_size is not None and max(image.size) > max_size:
+        image = image.copy()
+        image.thumbnail((max_size, max_size))
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
     byte_arr = io.BytesIO()
-    image.save(byte_arr, format='PNG')
+    image.save(byte_arr, format=image_format)
     return byte_arr.getvalue()
 
 
 def display_image(image):
-    image_widget = widgets.Image(value=pil_to_bytes(image), format='png')
+    # Accepts a PIL image or already encoded bytes, e.g. from PdfPageImages
+    import ipywidgets as widgets
+
+    image_bytes = image if isinstance(image, bytes) else pil_to_bytes(image)
+    image_widget = widgets.Image(value=image_bytes, format='jpeg' if image_bytes[:2] == b'\xff\xd8' else 'png')
     image_widget.layout.width = '400px'
     image_widget.layout.height = 'auto'
     image_widget.layout.object_fit = 'contain'
     return image_widget
 
-def json_to_html(json_obj, indent=0):
-    result = []
-    if isinstance(json_obj, dict):
-        result.append('<table class="json-object">')
-        for key, value in json_obj.items():
-            result.append('<tr>')
-            result.append(f'<td class="key">{key}</td>')
-            result.append('<td class="value">')
-            result.append(json_to_html(value, indent + 1))
-            result.append('</td>')
-            result.append('</tr>')
-        result.append('</table>')
-    elif isinstance(json_obj, list):
-        result.append('<table class="json-array">')
-        for i, item in enumerate(json_obj):
-            result.append('<tr>')
-            result.append(f'<td class="key">{i}</td>')
-            result.append('<td class="value">')
-            result.append(json_to_html(item, indent + 1))
-            result.append('</td>')
-            result.append('</tr>')
-        result.append('</table>')
-    elif isinstance(json_obj, (str, int, float, bool)) or json_obj is None:
-        if isinstance(json_obj, str):
-            result.append(f'<span class="string">"{json_obj}"</span>')
-        elif isinstance(json_obj, bool):
-            result.append(f'<span class="boolean">{str(json_obj).lower()}</span>')
-        elif json_obj is None:
-            result.append('<span class="null">null</span>')
-        else:
-            result.append(f'<span class="number">{json_obj}</span>')
-    return ''.join(result)
-    
-def display_json(json_data, title):
-    html_content = f"""
-    <div class="json-container">
-        <h3 class="json-title">{title}</h3>
-        <div class="json-viewer">
-            {json_to_html(json_data)}
-        </div>
-    </div>
+
+class _EncodedImageCache:
+    """Thread-safe LRU of encoded image bytes, bounded by total size."""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                self._size -= len(self._entries.popitem(last=False)[1])
+
+
+_encoded_images = _EncodedImageCache()
+
+
+class PdfPageImages:
+    """
+    Page images of a PDF, rendered and encoded only when first requested.
+
+    ``pages[i]`` returns the encoded bytes of page ``i`` (ready for
+    display_image / display_image_jsons). Encoded pages are kept in a shared
+    LRU keyed by file, page, scale, size and format, so re-displaying a page
+    costs nothing. Rasterizing goes through pdfium one page at a time (pdfium
+    is not thread-safe), while downscaling and encoding run in a thread pool;
+    ``prefetch`` starts that work ahead of time. Use it as a context manager
+    (or call ``close``) to release the PDF and worker threads; an instance
+    that is never closed releases them when it is garbage collected.
+
+    Example:
+        with PdfPageImages(file_name, scale=1.53) as pages:
+            display_image_jsons(pages[3], [...], [...])
+    """
+
+    def __init__(self, file_name, scale=1.53, max_size=None, image_format='PNG', max_workers=4):
+        try:
+            import pypdfium2
+        except ImportError:
+            raise ImportError("PdfPageImages requires pypdfium2: pip install pypdfium2")
+        self.file_name = os.path.realpath(file_name)
+        self.scale = scale
+        self.max_size = max_size
+        self.image_format = image_format
+        self._document = pypdfium2.PdfDocument(self.file_name)
+        self._page_count = len(self._document)
+        self._version = os.stat(self.file_name).st_mtime_ns
+        self._render_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, PdfPageImages._release, self._executor, self._document)
+
+    @staticmethod
+    def _release(executor, document):
+        executor.shutdown(wait=True)
+        document.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._page_count
+
+    def _key(self, page_index, max_size):
+        return (self.file_name, self._version, page_index, self.scale, max_size, self.image_format)
+
+    def render(self, page_index, max_size=None):
+        """Rasterize one page to a PIL image (not cached), at a lower scale if ``max_size`` needs less."""
+        if not 0 <= page_index < self._page_count:
+            raise IndexError(f'page {page_index} out of range for {self._page_count} pages')
+        with self._render_lock:
+            page = self._document[page_index]
+            scale = self.scale
+            if max_size is not None:
+                # Rasterize thumbnails small instead of downscaling a full-resolution page
+                scale = min(scale, max_size / max(page.get_size()))
+            return page.render(scale=scale).to_pil()
+
+    def _encode(self, page_index, max_size):
+        key = self._key(page_index, max_size)
+        image_bytes = _encoded_images.get(key)
+        if image_bytes is None:
+            image_bytes = pil_to_bytes(self.render(page_index, max_size), max_size=max_size, image_format=self.image_format)
+            _encoded_images.put(key, image_bytes)
+        return image_bytes
+
+    def _submit(self, page_index, max_size):
+        key = self._key(page_index, max_size)
+        with self._pending_lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._encode, page_index, max_size)
+                self._pending[key] = future
+                future.add_done_callback(lambda _: self._pending.pop(key, None))
+            return future
+
+    def get(self, page_index, max_size=None):
+        """Encoded bytes of a page, downscaled to fit ``max_size`` (defaults to the instance's max_size)."""
+        max_size = self.max_size if max_size is None else max_size
+        image_bytes = _encoded_images.get(self._key(page_index, max_size))
+        if image_bytes is not None:
+            return image_bytes
+        return self._submit(page_index, max_size).result()
+
+    def __getitem__(self, page_index):
+        if page_index < 0:
+            page_index += self._page_count
+        return self.get(page_index)
+
+    def thumbnail(self, page_index, max_size=200):
+        return self.get(page_index, max_size=max_size)
+
+    def prefetch(self, page_indices, max_size=None):
+        """Start rendering and encoding pages in the background; returns the futures."""
+        max_size = self.max_size if max_size is None else max_size
+        return [self._submit(page_index, max_size) for page_index in page_indices
+                if _encoded_images.get(self._key(page_index, max_size)) is None]
+
+    def close(self):
+        # Runs the release at most once, whether closed here or on garbage collection
+        self._finalizer()
+
+
+JSON_VIEW_STYLE = """
     <style>
-        .json-container {{
+        .json-container {
             margin-bottom: 20px;
-        }}
-        .json-title {{
+        }
+        .json-title {
             font-family: sans-serif;
             font-size: 18px;
             font-weight: bold;
             margin-bottom: 10px;
             color: #333;
-        }}
-        .json-viewer {{
+        }
+        .json-viewer {
             font-family: monospace;
             font-size: 14px;
             line-height: 1.5;
@@ -80,28 +195,140 @@ def display_json(json_data, title):
             padding: 10px;
             max-height: 500px;
             overflow: auto;
-        }}
-        .json-object, .json-array {{
+        }
+        .json-object, .json-array {
             border-collapse: collapse;
             margin-left: 20px;
-        }}
-        .key {{
+        }
+        .key {
             color: #881391;
             vertical-align: top;
             padding-right: 10px;
-        }}
-        .value {{
+        }
+        .value {
             padding-left: 10px;
-        }}
-        .string {{ color: #1a1aa6; }}
-        .number {{ color: #116644; }}
-        .boolean {{ color: #ff8c00; }}
-        .null {{ color: #808080; }}
+        }
+        .string { color: #1a1aa6; }
+        .number { color: #116644; }
+        .boolean { color: #ff8c00; }
+        .null { color: #808080; }
     </style>
+"""
+
+
+def _json_section(value, path, max_depth, max_items, start=0):
+    def render():
+        deferred = []
+        return json_to_html(value, max_depth=max_depth, max_items=max_items, deferred=deferred,
+                            path=path, start=start), deferred
+    return render
+
+
+def json_to_html(json_obj, indent=0, max_depth=6, max_items=500, deferred=None, path='', start=0):
     """
-    return widgets.HTML(html_content)
+    Render a JSON-like value as nested HTML tables.
+
+    The output is written into a single list with an explicit stack, so the
+    cost is linear in the size of what is rendered however deep the value is.
+    Keys and values are HTML-escaped. Containers nested ``max_depth`` levels
+    down, and entries past the first ``max_items`` of a container, are not
+    rendered: they are replaced by a placeholder and, when a ``deferred`` list
+    is given, appended to it as (label, render) pairs whose ``render()``
+    returns their HTML and further deferred sections on demand (see
+    display_json). Without ``deferred`` they are simply left out.
+    """
+    out = []
+    stack = [(json_obj, indent, path, start)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            out.append(item)
+            continue
+        value, depth, path, start = item
+        if isinstance(value, (dict, list)):
+            is_dict = isinstance(value, dict)
+            if value and max_depth is not None and depth - indent >= max_depth:
+                label = path or 'root'
+                if deferred is not None:
+                    deferred.append((label, _json_section(value, label, max_depth, max_items)))
+                out.append(f'<span class="null">{len(value)} {"keys" if is_dict else "items"} '
+                           f'not shown{f": see &quot;{html.escape(label)}&quot; below" if deferred is not None else ""}</span>')
+                continue
+            entries = itertools.islice(value.items() if is_dict else enumerate(value), start, None)
+            pending = [f'<table class="{"json-object" if is_dict else "json-array"}">']
+            for count, (key, child) in enumerate(entries):
+                if max_items is not None and count == max_items:
+                    rest = start + max_items
+                    label = f"{path or 'root'} (entries {rest + 1}-{len(value)})"
+                    if deferred is not None:
+                        deferred.append((label, _json_section(value, path, max_depth, max_items, rest)))
+                    pending.append(f'<tr><td class="key">&hellip;</td><td class="value"><span class="null">'
+                                   f'{len(value) - rest} more not shown'
+                                   f'{f": see &quot;{html.escape(label)}&quot; below" if deferred is not None else ""}'
+                                   f'</span></td></tr>')
+                    break
+                child_path = f'{path}.{key}' if is_dict and path else (str(key) if is_dict else f'{path}[{key}]')
+                pending.append(f'<tr><td class="key">{html.escape(str(key))}</td><td class="value">')
+                pending.append((child, depth + 1, child_path, 0))
+                pending.append('</td></tr>')
+            pending.append('</table>')
+            stack.extend(reversed(pending))
+        elif isinstance(value, str):
+            out.append(f'<span class="string">"{html.escape(value)}"</span>')
+        elif isinstance(value, bool):
+            out.append(f'<span class="boolean">{str(value).lower()}</span>')
+        elif value is None:
+            out.append('<span class="null">null</span>')
+        elif isinstance(value, (int, float)):
+            out.append(f'<span class="number">{value}</span>')
+    return ''.join(out)
+
+
+def _deferred_sections_view(content, deferred):
+    # content plus a selector that renders each left-out section only when it is opened.
+    # Mirrors deferred_sections_view in 20_Understanding-BDA/utils/display_functions.py: that
+    # package is also named ``utils``, so it cannot be imported next to this one; keep both in sync
+    import ipywidgets as widgets
+
+    sections = dict(deferred)
+    selector = widgets.Dropdown(options=list(sections), description='Collapsed',
+                                layout=widgets.Layout(width='70%'))
+    open_button = widgets.Button(description='Show', layout=widgets.Layout(width='90px'))
+    section_html = widgets.HTML()
+
+    def open_section(_):
+        label = selector.value
+        if label is None:
+            return
+        section, more = sections[label]()
+        section_html.value = f'{JSON_VIEW_STYLE}<div class="json-viewer">{section}</div>'
+        for more_label, render in more:
+            sections.setdefault(more_label, render)
+        selector.options = list(sections)
+        selector.value = label
+
+    open_button.on_click(open_section)
+    return widgets.VBox([content, widgets.HBox([selector, open_button]), section_html])
+
+
+def display_json(json_data, title):
+    deferred = []
+    html_content = f"""
+    <div class="json-container">
+        <h3 class="json-title">{html.escape(str(title))}</h3>
+        <div class="json-viewer">
+            {json_to_html(json_data, deferred=deferred)}
+        </div>
+    </div>
+    {JSON_VIEW_STYLE}
+    """
+    import ipywidgets as widgets
+    view = widgets.HTML(html_content)
+    return _deferred_sections_view(view, deferred) if deferred else view
 
 def display_image_jsons(image, json_arr, titles):
+    import ipywidgets as widgets
+
     image_widget = display_image(image)
     right_column =  widgets.VBox([display_json(data, title) for data, title in zip(json_arr, titles)])
     bordered_hbox = widgets.HBox([image_widget, right_column])
@@ -111,7 +338,33 @@ def display_image_jsons(image, json_arr, titles):
     return bordered_hbox
 
 
-def get_s3_to_dict(s3, s3_url):
+@lru_cache(maxsize=None)
+def get_s3_client(region_name=None, max_pool_connections=50):
+    # Created once per region and pool size; boto3 clients are safe to share across threads
+    import boto3
+    from botocore.config import Config
+    return boto3.client('s3', region_name=region_name,
+                        config=Config(max_pool_connections=max_pool_connections))
+
+
+# Optional tracing hook: a span(name, **attributes) context manager factory, e.g. span from
+# 20_Understanding-BDA/utils/instrumentation.py. None keeps get_s3_to_dict untraced.
+trace_span = None
+
+
+def get_s3_to_dict(s3=None, s3_url=None, cache=None):
+    if trace_span is None:
+        return _get_s3_to_dict(s3, s3_url, cache)
+    with trace_span('s3.get_s3_to_dict', s3_uri=s3_url, cached=cache is not None):
+        return _get_s3_to_dict(s3, s3_url, cache)
+
+
+def _get_s3_to_dict(s3, s3_url, cache):
+    s3 = s3 or get_s3_client()
+    if cache is not None:
+        # Any cache exposing get_json(s3_uri, s3_client), e.g. the ETag-validated
+        # S3ObjectCache from 20_Understanding-BDA/utils/s3_cache.py
+        return cache.get_json(s3_url, s3)
     bucket_name = s3_url.split('/')[2]
     object_key = '/'.join(s3_url.split('/')[3:])
     
@@ -121,4 +374,4 @@ def get_s3_to_dict(s3, s3_url):
     
     # Parse the JSON content
     json_obj = json.loads(json_content)
-    return json_obj
\ No newline at end of file
+    return json_obj